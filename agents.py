@@ -2,6 +2,9 @@ import random
 from abc import ABC, abstractmethod
 
 
+AGENT_TYPE_CODES = {"Dek": 1, "Thia": 2, "Predator": 3, "Monster": 4, "Adversary": 5}
+
+
 class Agent(ABC):
 
     def __init__(self, grid, position, name="Agent"):
@@ -11,6 +14,7 @@ class Agent(ABC):
         self.health = 100
         self.max_health = 100
         self.is_alive = True
+        self.damage_listener = None
         grid.place_agent(self, position)
 
     @abstractmethod
@@ -22,11 +26,19 @@ class Agent(ABC):
         pass
 
     def take_damage(self, amount):
+        self.receive_damage(amount)
+
+    def receive_damage(self, amount):
+        was_alive = self.is_alive
+        old_health = self.health
         self.health = max(0, self.health - amount)
         if self.health <= 0:
             self.is_alive = False
             self.grid.remove_agent(self.position)
 
+        if self.damage_listener:
+            self.damage_listener(self, old_health - self.health, was_alive and not self.is_alive)
+
     def heal(self, amount):
         self.health = min(self.max_health, self.health + amount)
 
@@ -36,6 +48,8 @@ class Agent(ABC):
 
 class Predator(Agent):
 
+    SIGHT_RADIUS = 8
+
     def __init__(self, grid, position, name="Predator", role="peer"):
         super().__init__(grid, position, name)
         self.role = role
@@ -52,10 +66,13 @@ class Predator(Agent):
         if self._check_dek_violations(dek, simulation):
             return {"type": "challenge", "target": dek}
 
-        monsters = [m for m in simulation.monsters if m.is_alive]
+        if simulation.visibility:
+            monsters = [a for a in simulation.visible_agents(self, self.SIGHT_RADIUS) if isinstance(a, Monster)]
+        else:
+            monsters = [m for m in simulation.live_monsters if m.is_alive]
         if monsters and random.random() < 0.4:
-            closest = min(monsters, key=lambda m: self.grid.get_distance(self.position, m.position))
-            if self.grid.get_distance(self.position, closest.position) <= 2:
+            closest, dist = simulation.nearest(self, monsters)
+            if dist <= 2:
                 return {"type": "hunt", "target": closest}
             else:
                 return {"type": "move_towards", "target": closest.position}
@@ -78,8 +95,7 @@ class Predator(Agent):
         if self.stamina < 5:
             return
 
-        neighbors = self.grid.get_neighbors(*self.position)
-        passable = [(x, y, c) for x, y, c in neighbors if c.is_passable()]
+        passable = self.grid.get_passable_neighbors(*self.position)
 
         if passable:
             x, y, cell = random.choice(passable)
@@ -108,6 +124,12 @@ class Predator(Agent):
             return
 
         hit_chance = 0.7
+
+        if simulation.combat:
+            simulation.combat.queue_attack(self, target, hit_chance, (20, 40), on_kill=self._claim_trophy)
+            self.stamina -= 10
+            return
+
         damage = random.randint(20, 40)
 
         if random.random() < hit_chance:
@@ -116,12 +138,15 @@ class Predator(Agent):
 
             if not target.is_alive:
                 print(f"{self.name} defeated {target.name}!")
-                self.trophies.append(target.name)
-                self.reputation += 5
-                simulation.clan_honor += 10
+                self._claim_trophy(target, simulation)
 
         self.stamina -= 10
 
+    def _claim_trophy(self, target, simulation):
+        self.trophies.append(target.name)
+        self.reputation += 5
+        simulation.clan_honor += 10
+
     def _challenge_dek(self, dek, simulation):
         print(f"\n{self.name} challenges Dek!")
 
@@ -159,7 +184,7 @@ class Dek(Agent):
             return {"type": "rest"}
 
         if self.thia and self.thia.is_alive and not self.is_carrying_thia:
-            dist = self.grid.get_distance(self.position, self.thia.position)
+            dist = simulation.distance(self, self.thia)
             if dist <= 1:
                 return {"type": "carry_thia"}
             elif dist <= 5:
@@ -167,18 +192,17 @@ class Dek(Agent):
 
         adversary = simulation.adversary
         if adversary.is_alive:
-            dist = self.grid.get_distance(self.position, adversary.position)
+            dist = simulation.distance(self, adversary)
             if dist <= 2:
                 return {"type": "fight", "target": adversary}
             elif self.health > 60 and self.stamina > 40:
                 return {"type": "move_towards", "target": adversary.position}
 
-        monsters = [m for m in simulation.monsters if m.is_alive]
+        monsters = [m for m in simulation.live_monsters if m.is_alive]
         if monsters and self.stamina > 30:
             worthy = [m for m in monsters if m.health > 30]
             if worthy:
-                closest = min(worthy, key=lambda m: self.grid.get_distance(self.position, m.position))
-                dist = self.grid.get_distance(self.position, closest.position)
+                closest, dist = simulation.nearest(self, worthy)
                 if dist <= 2:
                     return {"type": "hunt", "target": closest}
                 else:
@@ -196,6 +220,8 @@ class Dek(Agent):
             self._rest()
         elif action_type == "move_towards":
             self._move_towards(action["target"], simulation)
+        elif action_type == "step":
+            self._step(action["direction"], simulation)
         elif action_type == "carry_thia":
             self._carry_thia()
         elif action_type == "hunt":
@@ -217,7 +243,17 @@ class Dek(Agent):
         dx = 1 if tx > x else -1 if tx < x else 0
         dy = 1 if ty > y else -1 if ty < y else 0
 
-        new_pos = (x + dx, y + dy)
+        self._move_to((x + dx, y + dy), simulation)
+
+    def _step(self, direction, simulation):
+        if self.stamina < 3:
+            return
+
+        x, y = self.position
+        dx, dy = direction
+        self._move_to(((x + dx) % self.grid.width, (y + dy) % self.grid.height), simulation)
+
+    def _move_to(self, new_pos, simulation):
         cell = self.grid.get_cell(*new_pos)
 
         if cell.is_passable():
@@ -235,6 +271,8 @@ class Dek(Agent):
 
             if self.is_carrying_thia and self.thia:
                 self.thia.position = new_pos
+                if simulation.distances:
+                    simulation.distances.mark_moved(self.thia)
 
     def _carry_thia(self):
         if self.thia and not self.is_carrying_thia:
@@ -244,15 +282,30 @@ class Dek(Agent):
                 print(f"Dek is now carrying Thia.")
 
     def _hunt_target(self, target, simulation):
+        if not self._strike(target, simulation):
+            self._answer_to_code(target, simulation)
+
+    def _answer_to_code(self, target, simulation):
+        simulation.judge_hunt(self, target)
+
+    def _strike(self, target, simulation):
         if not target.is_alive:
-            return
+            return False
 
         if target.health < 20:
             print(f"Dek refuses to hunt weakened {target.name} (Clan Code: Hunt the Worthy)")
             self.code_violations.append("Attempted unworthy hunt")
-            return
+            return False
 
         hit_chance = 0.75
+
+        if simulation.combat:
+            simulation.combat.queue_attack(self, target, hit_chance, (25, 45),
+                                           counter_chance=0.4, counter_range=(10, 25), on_kill=self._claim_trophy,
+                                           on_resolved=self._answer_to_code)
+            self.stamina -= 12
+            return True
+
         damage = random.randint(25, 45)
 
         if random.random() < hit_chance:
@@ -261,9 +314,7 @@ class Dek(Agent):
 
             if not target.is_alive:
                 print(f"Dek defeated {target.name}! Trophy claimed.")
-                self.trophies.append(target.name)
-                self.reputation += 10
-                simulation.clan_honor += 5
+                self._claim_trophy(target, simulation)
         else:
             print(f"Dek's attack missed!")
 
@@ -274,6 +325,13 @@ class Dek(Agent):
             self.take_damage(counter_damage)
             print(f"{target.name} counter-attacks for {counter_damage} damage!")
 
+        return False
+
+    def _claim_trophy(self, target, simulation):
+        self.trophies.append(target.name)
+        self.reputation += 10
+        simulation.clan_honor += 5
+
     def _fight_adversary(self, adversary, simulation):
         if not adversary.is_alive:
             return
@@ -285,6 +343,11 @@ class Dek(Agent):
             hit_chance = 0.75
             print("Thia provides tactical support!")
 
+        if simulation.combat:
+            simulation.combat.queue_attack(self, adversary, hit_chance, (30, 50), on_kill=self._claim_victory)
+            self.stamina -= 15
+            return
+
         damage = random.randint(30, 50)
 
         if random.random() < hit_chance:
@@ -292,18 +355,23 @@ class Dek(Agent):
             print(f"Dek strikes the adversary for {damage} damage!")
 
             if not adversary.is_alive:
-                print(f"\n*** DEK DEFEATS THE ULTIMATE ADVERSARY! ***")
-                self.reputation += 50
-                simulation.clan_honor += 100
-                simulation.victory = True
+                self._claim_victory(adversary, simulation)
         else:
             print(f"Dek's attack missed the adversary!")
 
         self.stamina -= 15
 
+    def _claim_victory(self, adversary, simulation):
+        print(f"\n*** DEK DEFEATS THE ULTIMATE ADVERSARY! ***")
+        self.reputation += 50
+        simulation.clan_honor += 100
+        simulation.victory = True
+
 
 class Thia(Agent):
 
+    RECON_RADIUS = 3
+
     def __init__(self, grid, position, is_damaged=True):
         super().__init__(grid, position, "Thia")
         self.is_damaged = is_damaged
@@ -329,6 +397,13 @@ class Thia(Agent):
             self._perform_reconnaissance(simulation)
 
     def _perform_reconnaissance(self, simulation):
+        if simulation.visibility:
+            for tx, ty, cell in simulation.visibility.field_of_view(self.position, self.RECON_RADIUS):
+                if cell.is_trap and (tx, ty) not in self.knowledge_database["trap_locations"]:
+                    self.knowledge_database["trap_locations"].append((tx, ty))
+                    print("Thia detected a trap nearby.")
+            return
+
         x, y = self.position
 
         for dx in range(-3, 4):
@@ -353,6 +428,8 @@ class Thia(Agent):
 
 class Monster(Agent):
 
+    SIGHT_RADIUS = 3
+
     def __init__(self, grid, position, name="Monster"):
         super().__init__(grid, position, name)
         self.aggression = random.uniform(0.3, 0.8)
@@ -360,15 +437,10 @@ class Monster(Agent):
         self.max_health = self.health
 
     def decide_action(self, simulation):
-        nearest_agent = None
-        min_dist = float('inf')
-
-        for agent in simulation.get_all_agents():
-            if agent != self and agent.is_alive:
-                dist = self.grid.get_distance(self.position, agent.position)
-                if dist < min_dist:
-                    min_dist = dist
-                    nearest_agent = agent
+        if simulation.visibility:
+            nearest_agent, min_dist = simulation.nearest_visible_agent(self, self.SIGHT_RADIUS)
+        else:
+            nearest_agent, min_dist = simulation.nearest_live_agent(self)
 
         if nearest_agent and min_dist <= 2 and random.random() < self.aggression:
             return {"type": "attack", "target": nearest_agent}
@@ -379,17 +451,20 @@ class Monster(Agent):
         if action["type"] == "wander":
             self._wander()
         elif action["type"] == "attack":
-            self._attack(action["target"])
+            self._attack(action["target"], simulation)
 
     def _wander(self):
-        neighbors = self.grid.get_neighbors(*self.position)
-        passable = [(x, y, c) for x, y, c in neighbors if c.is_passable()]
+        passable = self.grid.get_passable_neighbors(*self.position)
 
         if passable:
             x, y, _ = random.choice(passable)
             self.grid.move_agent(self.position, (x, y))
 
-    def _attack(self, target):
+    def _attack(self, target, simulation):
+        if simulation.combat:
+            simulation.combat.queue_attack(self, target, 1.0, (15, 30))
+            return
+
         damage = random.randint(15, 30)
         target.take_damage(damage)
         print(f"{self.name} attacks {target.name} for {damage} damage!")
@@ -412,7 +487,7 @@ class Adversary(Agent):
     def decide_action(self, simulation):
         dek = simulation.dek
 
-        dist_to_dek = self.grid.get_distance(self.position, dek.position)
+        dist_to_dek = simulation.distance(self, dek)
 
         if dist_to_dek <= 3:
             return {"type": "attack", "target": dek}
@@ -429,7 +504,7 @@ class Adversary(Agent):
         elif action_type == "move_towards":
             self._move_towards(action["target"])
         elif action_type == "attack":
-            self._attack(action["target"])
+            self._attack(action["target"], simulation)
 
     def _patrol_territory(self):
         x, y = self.position
@@ -438,8 +513,7 @@ class Adversary(Agent):
         if self.grid.get_distance((x, y), (tx, ty)) > self.territory_radius:
             self._move_towards((tx, ty))
         else:
-            neighbors = self.grid.get_neighbors(*self.position)
-            passable = [(nx, ny, c) for nx, ny, c in neighbors if c.is_passable()]
+            passable = self.grid.get_passable_neighbors(*self.position)
             if passable:
                 nx, ny, _ = random.choice(passable)
                 self.grid.move_agent(self.position, (nx, ny))
@@ -457,19 +531,22 @@ class Adversary(Agent):
         if cell.is_passable():
             self.grid.move_agent(self.position, new_pos)
 
-    def _attack(self, target):
+    ATTACK_PATTERNS = (
+        ((35, 50), "Adversary unleashes devastating strike!"),
+        ((25, 40), "Adversary performs area sweep!"),
+        ((30, 45), "Adversary lunges with crushing force!")
+    )
+
+    def _attack(self, target, simulation):
         self.attack_pattern = (self.attack_pattern + 1) % 3
+        damage_range, message = self.ATTACK_PATTERNS[self.attack_pattern]
+        print(message)
 
-        if self.attack_pattern == 0:
-            damage = random.randint(35, 50)
-            print(f"Adversary unleashes devastating strike!")
-        elif self.attack_pattern == 1:
-            damage = random.randint(25, 40)
-            print(f"Adversary performs area sweep!")
-        else:
-            damage = random.randint(30, 45)
-            print(f"Adversary lunges with crushing force!")
+        if simulation.combat:
+            simulation.combat.queue_attack(self, target, 1.0, damage_range)
+            return
 
+        damage = random.randint(*damage_range)
         target.take_damage(damage)
         print(f"Adversary deals {damage} damage to {target.name}!")
 
@@ -0,0 +1,242 @@
+import argparse
+import csv
+
+import numpy as np
+
+from events import find_logs, read_events
+from simulation import YautjaClanCode
+
+
+class ClanCodeAnalytics:
+
+    def __init__(self, batch_size=65536):
+        self.batch_size = batch_size
+        self.runs = 0
+        self.events = 0
+
+        self.groups = {}
+        self.group_keys = []
+        self._action_groups = []
+        self._action_reputation = []
+        self._verdict_groups = []
+        self._verdict_unworthy = []
+        self._verdict_harmed = []
+
+        self.hunts = np.zeros(0, dtype=np.int64)
+        self.unworthy_hunts = np.zeros(0, dtype=np.int64)
+        self.harmed_unworthy = np.zeros(0, dtype=np.int64)
+        self.challenges_passed = np.zeros(0, dtype=np.int64)
+        self.challenges_failed = np.zeros(0, dtype=np.int64)
+        self.attempts = np.zeros(0, dtype=np.int64)
+
+        self._turns = []
+        self._turn_honor = []
+        self._turn_reputation = []
+
+        self.turn_count = np.zeros(0, dtype=np.int64)
+        self.honor_sum = np.zeros(0, dtype=np.float64)
+        self.honor_min = np.zeros(0, dtype=np.float64)
+        self.honor_max = np.zeros(0, dtype=np.float64)
+        self.reputation_sum = np.zeros(0, dtype=np.float64)
+
+    def _group(self, agent_type, action):
+        key = (agent_type, action)
+        index = self.groups.get(key)
+        if index is None:
+            index = len(self.group_keys)
+            self.groups[key] = index
+            self.group_keys.append(key)
+        return index
+
+    def consume(self, event):
+        self.events += 1
+        kind = event.get("event")
+
+        if kind == "action":
+            self._action_groups.append(self._group(event["agent_type"], event["action"]))
+            self._action_reputation.append(event.get("reputation_delta", 0))
+            if len(self._action_groups) >= self.batch_size:
+                self._flush_actions()
+        elif kind == "verdict":
+            violations = event["violations"]
+            self._verdict_groups.append(self._group(event["agent_type"], event["action"]))
+            self._verdict_unworthy.append(YautjaClanCode.UNWORTHY_PREY in violations)
+            self._verdict_harmed.append(YautjaClanCode.HARMED_UNWORTHY in violations)
+            if len(self._verdict_groups) >= self.batch_size:
+                self._flush_verdicts()
+        elif kind == "turn":
+            self._turns.append(event["turn"])
+            self._turn_honor.append(event["clan_honor"])
+            self._turn_reputation.append(event["reputation"])
+            if len(self._turns) >= self.batch_size:
+                self._flush_turns()
+        elif kind == "run":
+            self.runs += 1
+
+    def consume_file(self, path):
+        for event in read_events(path):
+            self.consume(event)
+
+    def _grow(self, name, size, fill=0):
+        array = getattr(self, name)
+        if len(array) < size:
+            grown = np.full(size, fill, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def _grow_groups(self):
+        size = len(self.group_keys)
+        for name in ("attempts", "hunts", "unworthy_hunts", "harmed_unworthy",
+                     "challenges_passed", "challenges_failed"):
+            self._grow(name, size)
+        return size
+
+    def _flush_actions(self):
+        if not self._action_groups:
+            return
+
+        groups = np.array(self._action_groups, dtype=np.int64)
+        reputation = np.array(self._action_reputation, dtype=np.float64)
+        self._action_groups, self._action_reputation = [], []
+
+        size = self._grow_groups()
+        actions = np.array([action for _, action in self.group_keys])
+        is_hunt = (actions == "hunt")[groups]
+        is_challenge = (actions == "challenge")[groups]
+
+        self.attempts += np.bincount(groups, minlength=size)
+        self.hunts += np.bincount(groups, weights=is_hunt, minlength=size).astype(np.int64)
+        self.challenges_passed += np.bincount(groups, weights=is_challenge & (reputation > 0),
+                                              minlength=size).astype(np.int64)
+        self.challenges_failed += np.bincount(groups, weights=is_challenge & (reputation < 0),
+                                              minlength=size).astype(np.int64)
+
+    def _flush_verdicts(self):
+        if not self._verdict_groups:
+            return
+
+        groups = np.array(self._verdict_groups, dtype=np.int64)
+        unworthy = np.array(self._verdict_unworthy, dtype=bool)
+        harmed = np.array(self._verdict_harmed, dtype=bool)
+        self._verdict_groups, self._verdict_unworthy, self._verdict_harmed = [], [], []
+
+        size = self._grow_groups()
+        self.unworthy_hunts += np.bincount(groups, weights=unworthy, minlength=size).astype(np.int64)
+        self.harmed_unworthy += np.bincount(groups, weights=harmed, minlength=size).astype(np.int64)
+
+    def _flush_turns(self):
+        if not self._turns:
+            return
+
+        turns = np.array(self._turns, dtype=np.int64)
+        honor = np.array(self._turn_honor, dtype=np.float64)
+        reputation = np.array(self._turn_reputation, dtype=np.float64)
+        self._turns, self._turn_honor, self._turn_reputation = [], [], []
+
+        size = int(turns.max()) + 1
+        self._grow("turn_count", size)
+        self._grow("honor_sum", size)
+        self._grow("reputation_sum", size)
+        self._grow("honor_min", size, np.inf)
+        self._grow("honor_max", size, -np.inf)
+
+        np.add.at(self.turn_count, turns, 1)
+        np.add.at(self.honor_sum, turns, honor)
+        np.add.at(self.reputation_sum, turns, reputation)
+        np.minimum.at(self.honor_min, turns, honor)
+        np.maximum.at(self.honor_max, turns, honor)
+
+    def flush(self):
+        self._flush_actions()
+        self._flush_verdicts()
+        self._flush_turns()
+
+    def violation_table(self):
+        self.flush()
+        rows = []
+        for i, (agent_type, action) in enumerate(self.group_keys):
+            attempts = int(self.attempts[i])
+            hunts = int(self.hunts[i])
+            rows.append({
+                "agent_type": agent_type,
+                "action": action,
+                "attempts": attempts,
+                "unworthy_hunts": int(self.unworthy_hunts[i]),
+                "unworthy_hunt_rate": self.unworthy_hunts[i] / hunts if hunts else 0.0,
+                "harmed_unworthy": int(self.harmed_unworthy[i]),
+                "harmed_unworthy_rate": self.harmed_unworthy[i] / hunts if hunts else 0.0,
+                "challenges_passed": int(self.challenges_passed[i]),
+                "challenges_failed": int(self.challenges_failed[i])
+            })
+        return rows
+
+    def honor_table(self):
+        self.flush()
+        rows = []
+        for turn in np.flatnonzero(self.turn_count):
+            count = self.turn_count[turn]
+            rows.append({
+                "turn": int(turn),
+                "runs": int(count),
+                "mean_clan_honor": self.honor_sum[turn] / count,
+                "min_clan_honor": self.honor_min[turn],
+                "max_clan_honor": self.honor_max[turn],
+                "mean_reputation": self.reputation_sum[turn] / count
+            })
+        return rows
+
+
+def analyze(paths, batch_size=65536):
+    analytics = ClanCodeAnalytics(batch_size=batch_size)
+    for path in find_logs(paths):
+        analytics.consume_file(path)
+    analytics.flush()
+    return analytics
+
+
+def write_csv(path, rows):
+    if not rows:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def print_report(analytics, every=10):
+    print("=" * 60)
+    print("CLAN CODE ANALYTICS")
+    print("=" * 60)
+    print(f"Runs: {analytics.runs} | Events: {analytics.events}")
+    print()
+    print(f"{'Agent':<10} {'Action':<10} {'Attempts':>9} {'Unworthy':>9} {'Rate':>6} {'Harmed':>7} {'Chal +/-':>9}")
+    for row in analytics.violation_table():
+        print(f"{row['agent_type']:<10} {row['action']:<10} {row['attempts']:>9} {row['unworthy_hunts']:>9} "
+              f"{row['unworthy_hunt_rate']:>6.1%} {row['harmed_unworthy']:>7} "
+              f"{row['challenges_passed']:>4}/{row['challenges_failed']:<4}")
+    print()
+    print(f"{'Turn':>5} {'Runs':>6} {'Honor':>8} {'Min':>6} {'Max':>6} {'Reputation':>11}")
+    for row in analytics.honor_table():
+        if row["turn"] % every == 0 or row["turn"] == 1:
+            print(f"{row['turn']:>5} {row['runs']:>6} {row['mean_clan_honor']:>8.1f} {row['min_clan_honor']:>6.0f} "
+                  f"{row['max_clan_honor']:>6.0f} {row['mean_reputation']:>11.1f}")
+    print("=" * 60)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate clan-code violations and honor trajectories over run logs")
+    parser.add_argument("paths", nargs="+", help="event log files or directories of logs")
+    parser.add_argument("--csv", metavar="PREFIX", help="write <PREFIX>_violations.csv and <PREFIX>_honor.csv")
+    parser.add_argument("--batch-size", type=int, default=65536)
+    args = parser.parse_args(argv)
+
+    analytics = analyze(args.paths, batch_size=args.batch_size)
+    print_report(analytics)
+
+    if args.csv:
+        write_csv(f"{args.csv}_violations.csv", analytics.violation_table())
+        write_csv(f"{args.csv}_honor.csv", analytics.honor_table())
+
+
+if __name__ == "__main__":
+    main()
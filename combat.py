@@ -0,0 +1,139 @@
+import random
+
+import numpy as np
+
+
+class CombatResolver:
+
+    def __init__(self, simulation):
+        self.sim = simulation
+        self._clear()
+
+    def _clear(self):
+        self.attackers = []
+        self.targets = []
+        self.hit_chances = []
+        self.damage_low = []
+        self.damage_high = []
+        self.counter_chances = []
+        self.counter_low = []
+        self.counter_high = []
+        self.on_kill = []
+        self.on_resolved = []
+
+    def queue_attack(self, attacker, target, hit_chance, damage_range,
+                     counter_chance=0.0, counter_range=(0, 0), on_kill=None, on_resolved=None):
+        self.attackers.append(attacker)
+        self.targets.append(target)
+        self.hit_chances.append(hit_chance)
+        self.damage_low.append(damage_range[0])
+        self.damage_high.append(damage_range[1])
+        self.counter_chances.append(counter_chance)
+        self.counter_low.append(counter_range[0])
+        self.counter_high.append(counter_range[1])
+        self.on_kill.append(on_kill)
+        self.on_resolved.append(on_resolved)
+
+    def _index_agents(self, agents):
+        index = {}
+        unique = []
+        ids = np.empty(len(agents), dtype=np.int64)
+        for i, agent in enumerate(agents):
+            key = id(agent)
+            slot = index.get(key)
+            if slot is None:
+                slot = len(unique)
+                index[key] = slot
+                unique.append(agent)
+            ids[i] = slot
+        return unique, ids
+
+    def _landed_damage(self, ids, damage, health):
+        order = np.argsort(ids, kind="stable")
+        sorted_ids = ids[order]
+        sorted_damage = damage[order]
+
+        cumulative = np.cumsum(sorted_damage)
+        group_start = np.searchsorted(sorted_ids, sorted_ids, side="left")
+        before = np.concatenate(([0], cumulative))[group_start]
+        cumulative = cumulative - before
+        already_dealt = cumulative - sorted_damage
+
+        remaining = health[sorted_ids]
+        applied = np.clip(remaining - already_dealt, 0, sorted_damage)
+        killing = (already_dealt < remaining) & (cumulative >= remaining) & (sorted_damage > 0)
+
+        landed = np.empty_like(applied)
+        landed[order] = applied
+        kills = np.empty_like(killing)
+        kills[order] = killing
+        return landed, kills
+
+    def resolve(self):
+        count = len(self.attackers)
+        if count == 0:
+            return
+
+        rng = np.random.default_rng(random.getrandbits(64))
+
+        attackers = self.attackers
+        targets = self.targets
+        on_kill = self.on_kill
+        on_resolved = self.on_resolved
+
+        hit_chances = np.array(self.hit_chances, dtype=np.float64)
+        damage_low = np.array(self.damage_low, dtype=np.int64)
+        damage_high = np.array(self.damage_high, dtype=np.int64)
+        counter_chances = np.array(self.counter_chances, dtype=np.float64)
+        counter_low = np.array(self.counter_low, dtype=np.int64)
+        counter_high = np.array(self.counter_high, dtype=np.int64)
+        self._clear()
+
+        hits = rng.random(count) < hit_chances
+        damage = rng.integers(damage_low, damage_high + 1)
+        counters = rng.random(count) < counter_chances
+        counter_damage = rng.integers(counter_low, counter_high + 1)
+
+        agents, target_ids = self._index_agents(targets)
+        attacker_agents, attacker_ids = self._index_agents(attackers)
+
+        health = np.array([a.health if a.is_alive else 0 for a in agents], dtype=np.int64)
+        resilience = np.array([getattr(a, "resilience", 0.0) for a in agents], dtype=np.float64)
+
+        damage = (damage * (1 - resilience[target_ids])).astype(np.int64)
+        damage[~hits] = 0
+        landed, kills = self._landed_damage(target_ids, damage, health)
+
+        dealt = np.bincount(target_ids, weights=landed, minlength=len(agents)).astype(np.int64)
+        survivors = (health - dealt) > 0
+
+        attacker_resilience = np.array([getattr(a, "resilience", 0.0) for a in attacker_agents], dtype=np.float64)
+        counter_damage = (counter_damage * (1 - attacker_resilience[attacker_ids])).astype(np.int64)
+        counter_damage[~(counters & survivors[target_ids])] = 0
+
+        judged = np.array([callback is not None for callback in on_resolved], dtype=bool)
+        for i in np.flatnonzero((landed > 0) | judged):
+            attacker, target = attackers[i], targets[i]
+            self.sim._acting_agent = attacker
+            if landed[i]:
+                target.receive_damage(int(landed[i]))
+                if kills[i]:
+                    print(f"{attacker.name} defeated {target.name}!")
+                    if on_kill[i]:
+                        on_kill[i](target, self.sim)
+            if on_resolved[i]:
+                on_resolved[i](target, self.sim)
+
+        for i in np.flatnonzero(counter_damage):
+            attacker, target = attackers[i], targets[i]
+            if not attacker.is_alive:
+                continue
+            self.sim._acting_agent = target
+            old_health = attacker.health
+            attacker.receive_damage(int(counter_damage[i]))
+            if attacker is self.sim.dek:
+                self.sim.stats["dek_damage_taken"] += old_health - attacker.health
+
+        self.sim._acting_agent = None
+        print(f"Combat resolved: {count} attacks, {int(hits.sum())} hits, "
+              f"{int(kills.sum())} kills, {int(np.count_nonzero(counter_damage))} counter-attacks")
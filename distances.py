@@ -0,0 +1,97 @@
+import numpy as np
+
+
+class DistanceCache:
+
+    def __init__(self, grid, agents):
+        self.grid = grid
+        self.agents = list(agents)
+        self.index = {id(agent): i for i, agent in enumerate(self.agents)}
+
+        count = len(self.agents)
+        self.positions = np.array([agent.position for agent in self.agents], dtype=np.int64).reshape(count, 2)
+        self.alive = np.array([agent.is_alive for agent in self.agents], dtype=bool)
+        self.matrix = np.zeros((count, count), dtype=np.int64)
+        self.dirty = set()
+        self._compute_all()
+
+    def _torus_distance(self, origins, targets):
+        delta = np.abs(origins[:, None, :] - targets[None, :, :])
+        sizes = np.array([self.grid.width, self.grid.height], dtype=np.int64)
+        return np.minimum(delta, sizes - delta).sum(axis=2)
+
+    def _compute_all(self):
+        self.matrix = self._torus_distance(self.positions, self.positions)
+        self.dirty.clear()
+
+    def add(self, agents):
+        start = len(self.agents)
+        for agent in agents:
+            self.index[id(agent)] = len(self.agents)
+            self.agents.append(agent)
+
+        added = len(self.agents) - start
+        if not added:
+            return
+
+        positions = np.array([agent.position for agent in self.agents[start:]], dtype=np.int64).reshape(added, 2)
+        self.positions = np.concatenate((self.positions, positions))
+        self.alive = np.concatenate((self.alive, [agent.is_alive for agent in self.agents[start:]]))
+        self.matrix = np.pad(self.matrix, ((0, added), (0, added)))
+        self.dirty.update(range(start, len(self.agents)))
+
+    def mark_moved(self, agent):
+        i = self.index.get(id(agent))
+        if i is not None:
+            self.dirty.add(i)
+
+    def mark_dead(self, agent):
+        i = self.index.get(id(agent))
+        if i is not None:
+            self.alive[i] = False
+
+    def refresh(self):
+        if not self.dirty:
+            return
+
+        rows = np.fromiter(self.dirty, dtype=np.int64, count=len(self.dirty))
+        for i in rows:
+            self.positions[i] = self.agents[i].position
+
+        if len(rows) * 4 > len(self.agents):
+            self._compute_all()
+            return
+
+        block = self._torus_distance(self.positions[rows], self.positions)
+        self.matrix[rows, :] = block
+        self.matrix[:, rows] = block.T
+        self.dirty.clear()
+
+    def get(self, a, b):
+        if self.dirty:
+            self.refresh()
+        return int(self.matrix[self.index[id(a)], self.index[id(b)]])
+
+    def row(self, agent):
+        if self.dirty:
+            self.refresh()
+        return self.matrix[self.index[id(agent)]]
+
+    def nearest(self, agent, candidates):
+        row = self.row(agent)
+        ids = np.fromiter((self.index[id(c)] for c in candidates), dtype=np.int64, count=len(candidates))
+        best = int(np.argmin(row[ids]))
+        return candidates[best], int(row[ids[best]])
+
+    def nearest_alive(self, agent):
+        row = self.row(agent)
+        i = self.index[id(agent)]
+
+        mask = self.alive.copy()
+        mask[i] = False
+        if not mask.any():
+            return None, float('inf')
+
+        masked = np.where(mask, row, np.iinfo(np.int64).max)
+        best = int(np.argmin(masked))
+        return self.agents[best], int(row[best])
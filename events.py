@@ -0,0 +1,53 @@
+import gzip
+import json
+import os
+
+
+def _open_text(path, mode):
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t")
+    return open(path, mode)
+
+
+class EventLog:
+
+    def __init__(self, path, **run_info):
+        self.path = path
+        self.file = _open_text(path, "w")
+        self.record({"event": "run", **run_info})
+
+    def record(self, event):
+        self.file.write(json.dumps(event, separators=(",", ":")) + "\n")
+
+    def close(self, simulation=None):
+        if simulation is not None:
+            self.record({
+                "event": "result",
+                "turns": simulation.turn,
+                "victory": simulation.victory,
+                "defeat": simulation.defeat,
+                "clan_honor": simulation.clan_honor,
+                "reputation": simulation.dek.reputation
+            })
+        self.file.close()
+
+
+def run_log_path(directory, seed):
+    return os.path.join(directory, f"run_{seed}.jsonl.gz")
+
+
+def find_logs(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".jsonl") or name.endswith(".jsonl.gz"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def read_events(path):
+    with _open_text(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
@@ -10,8 +10,21 @@ class TerrainType(Enum):
     HOSTILE_TERRAIN = "#"
 
 
+TERRAIN_TYPES = tuple(TerrainType)
+TERRAIN_CODES = {terrain: code for code, terrain in enumerate(TERRAIN_TYPES)}
+
+TERRAIN_DISTRIBUTION = (
+    (TerrainType.DESERT_CANYON, 0.20, 2),
+    (TerrainType.ROCKY_ZONE, 0.15, 3),
+    (TerrainType.TRAP, 0.05, None),
+    (TerrainType.HOSTILE_TERRAIN, 0.10, 4)
+)
+
+
 class Cell:
 
+    __slots__ = ("x", "y", "terrain", "occupant", "is_trap", "stamina_cost")
+
     def __init__(self, x, y, terrain=TerrainType.EMPTY):
         self.x = x
         self.y = y
@@ -39,34 +52,210 @@ class Cell:
         return self.terrain.value
 
 
-class Grid:
+class SharedCell(Cell):
+
+    __slots__ = ("_world", "_index")
+
+    def __init__(self, x, y, world, index):
+        self.x = x
+        self.y = y
+        self.occupant = None
+        self._world = world
+        self._index = index
+
+    @property
+    def terrain(self):
+        return TERRAIN_TYPES[self._world.terrain[self._index]]
+
+    @property
+    def stamina_cost(self):
+        return self._world.stamina_cost[self._index]
+
+    @property
+    def is_trap(self):
+        return bool(self._world.traps[self._index])
+
+
+class LazyCells:
+
+    def __init__(self, world, width, height):
+        self.world = world
+        self.width = width
+        self.height = height
+        self.columns = {}
+
+    def __len__(self):
+        return self.width
+
+    def __getitem__(self, x):
+        if not 0 <= x < self.width:
+            raise IndexError(x)
+
+        column = self.columns.get(x)
+        if column is None:
+            column = LazyCellColumn(self.world, x, self.height)
+            self.columns[x] = column
+        return column
+
+
+class LazyCellColumn:
+
+    def __init__(self, world, x, height):
+        self.world = world
+        self.x = x
+        self.height = height
+        self.cells = {}
+
+    def __len__(self):
+        return self.height
+
+    def __getitem__(self, y):
+        if not 0 <= y < self.height:
+            raise IndexError(y)
+
+        cell = self.cells.get(y)
+        if cell is None:
+            cell = SharedCell(self.x, y, self.world, self.x * self.height + y)
+            self.cells[y] = cell
+        return cell
+
+
+class LazyNeighborTable:
+
+    def __init__(self, grid, directions):
+        self.grid = grid
+        self.directions = directions
+        self.entries = {}
+
+    def get(self, x, y):
+        key = (x, y)
+        neighbors = self.entries.get(key)
+        if neighbors is None:
+            grid = self.grid
+            neighbors = tuple((x + dx, y + dy, grid.cells[(x + dx) % grid.width][(y + dy) % grid.height])
+                              for dx, dy in self.directions)
+            self.entries[key] = neighbors
+        return neighbors
+
+
+class FreeCellIndex:
 
     def __init__(self, width, height):
+        self.positions = [(x, y) for x in range(width) for y in range(height)]
+        self.index = {pos: i for i, pos in enumerate(self.positions)}
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, pos):
+        return pos in self.index
+
+    def add(self, pos):
+        if pos not in self.index:
+            self.index[pos] = len(self.positions)
+            self.positions.append(pos)
+
+    def discard(self, pos):
+        index = self.index.pop(pos, None)
+        if index is None:
+            return
+
+        last = self.positions.pop()
+        if index < len(self.positions):
+            self.positions[index] = last
+            self.index[last] = index
+
+    def all(self):
+        return list(self.positions)
+
+    def choice(self):
+        if not self.positions:
+            return None
+        return self.positions[random.randrange(len(self.positions))]
+
+    def sample(self, count):
+        return random.sample(self.positions, count)
+
+
+class SparseFreeCells:
+
+    def __init__(self, width, height, attempts=64):
+        self.width = width
+        self.height = height
+        self.attempts = attempts
+        self.occupied = set()
+
+    def __len__(self):
+        return self.width * self.height - len(self.occupied)
+
+    def __contains__(self, pos):
+        return pos not in self.occupied
+
+    def add(self, pos):
+        self.occupied.discard(pos)
+
+    def discard(self, pos):
+        self.occupied.add(pos)
+
+    def all(self):
+        return [(x, y) for x in range(self.width) for y in range(self.height) if (x, y) not in self.occupied]
+
+    def choice(self):
+        for _ in range(self.attempts):
+            pos = (random.randrange(self.width), random.randrange(self.height))
+            if pos not in self.occupied:
+                return pos
+
+        free = self.all()
+        return random.choice(free) if free else None
+
+    def sample(self, count):
+        if count * 2 > len(self):
+            return random.sample(self.all(), count)
+
+        chosen = set()
+        while len(chosen) < count:
+            pos = (random.randrange(self.width), random.randrange(self.height))
+            if pos not in self.occupied:
+                chosen.add(pos)
+        return random.sample(list(chosen), count)
+
+
+class Grid:
+
+    CARDINAL_DIRECTIONS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+    DIAGONAL_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+
+    def __init__(self, width, height, world=None):
         self.width = width
         self.height = height
-        self.cells = [[Cell(x, y) for y in range(height)] for x in range(width)]
-        self._generate_terrain()
+
+        if world is not None:
+            if (world.width, world.height) != (width, height):
+                raise ValueError(f"World is {world.width}x{world.height}, expected {width}x{height}")
+            self.cells = LazyCells(world, width, height)
+            self._free = SparseFreeCells(width, height)
+        else:
+            self.cells = [[Cell(x, y) for y in range(height)] for x in range(width)]
+            self._free = FreeCellIndex(width, height)
+        self.world = world
+        self.is_lazy = world is not None
+        self._neighbor_tables = {}
+        self.move_listener = None
+
+        if world is None:
+            self._generate_terrain()
 
     def _generate_terrain(self):
-        for _ in range(int(self.width * self.height * 0.20)):
-            x, y = random.randint(0, self.width - 1), random.randint(0, self.height - 1)
-            self.cells[x][y].terrain = TerrainType.DESERT_CANYON
-            self.cells[x][y].stamina_cost = 2
-
-        for _ in range(int(self.width * self.height * 0.15)):
-            x, y = random.randint(0, self.width - 1), random.randint(0, self.height - 1)
-            self.cells[x][y].terrain = TerrainType.ROCKY_ZONE
-            self.cells[x][y].stamina_cost = 3
-
-        for _ in range(int(self.width * self.height * 0.05)):
-            x, y = random.randint(0, self.width - 1), random.randint(0, self.height - 1)
-            self.cells[x][y].terrain = TerrainType.TRAP
-            self.cells[x][y].is_trap = True
-
-        for _ in range(int(self.width * self.height * 0.10)):
-            x, y = random.randint(0, self.width - 1), random.randint(0, self.height - 1)
-            self.cells[x][y].terrain = TerrainType.HOSTILE_TERRAIN
-            self.cells[x][y].stamina_cost = 4
+        for terrain, density, stamina_cost in TERRAIN_DISTRIBUTION:
+            for _ in range(int(self.width * self.height * density)):
+                x, y = random.randint(0, self.width - 1), random.randint(0, self.height - 1)
+                cell = self.cells[x][y]
+                cell.terrain = terrain
+                if terrain == TerrainType.TRAP:
+                    cell.is_trap = True
+                else:
+                    cell.stamina_cost = stamina_cost
 
     def get_cell(self, x, y):
         wrapped_x = x % self.width
@@ -76,19 +265,28 @@ class Grid:
     def is_valid_position(self, x, y):
         return 0 <= x < self.width and 0 <= y < self.height
 
+    def _get_neighbor_table(self, include_diagonals):
+        table = self._neighbor_tables.get(include_diagonals)
+        if table is None:
+            directions = self.CARDINAL_DIRECTIONS
+            if include_diagonals:
+                directions = directions + self.DIAGONAL_DIRECTIONS
+            table = LazyNeighborTable(self, directions)
+            self._neighbor_tables[include_diagonals] = table
+        return table
+
     def get_neighbors(self, x, y, include_diagonals=False):
-        neighbors = []
+        return self._get_neighbor_table(include_diagonals).get(x, y)
 
-        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    def get_passable_neighbors(self, x, y, include_diagonals=False):
+        return [n for n in self._get_neighbor_table(include_diagonals).get(x, y) if n[2].occupant is None]
 
-        if include_diagonals:
-            directions.extend([(1, 1), (1, -1), (-1, 1), (-1, -1)])
+    def get_neighbors_batch(self, positions, include_diagonals=False, passable_only=False):
+        table = self._get_neighbor_table(include_diagonals)
 
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            neighbors.append((nx, ny, self.get_cell(nx, ny)))
-
-        return neighbors
+        if passable_only:
+            return [[n for n in table.get(x, y) if n[2].occupant is None] for x, y in positions]
+        return [table.get(x, y) for x, y in positions]
 
     def get_distance(self, pos1, pos2):
         x1, y1 = pos1
@@ -99,14 +297,54 @@ class Grid:
 
         return dx + dy
 
+    def _mark_free(self, x, y):
+        self._free.add((x % self.width, y % self.height))
+
+    def _mark_occupied(self, x, y):
+        self._free.discard((x % self.width, y % self.height))
+
+    def count_empty_positions(self):
+        return len(self._free)
+
     def get_empty_positions(self):
-        empty = []
-        for x in range(self.width):
-            for y in range(self.height):
-                cell = self.cells[x][y]
-                if cell.is_passable():
-                    empty.append((x, y))
-        return empty
+        return self._free.all()
+
+    def random_empty_position(self):
+        return self._free.choice()
+
+    def random_empty_position_in(self, x_min, y_min, x_max, y_max, attempts=32):
+        region_width = x_max - x_min + 1
+        region_height = y_max - y_min + 1
+        if region_width <= 0 or region_height <= 0:
+            return None
+
+        for _ in range(attempts):
+            x = random.randint(x_min, x_max) % self.width
+            y = random.randint(y_min, y_max) % self.height
+            if (x, y) in self._free:
+                return (x, y)
+
+        candidates = []
+        for x in range(x_min, x_max + 1):
+            for y in range(y_min, y_max + 1):
+                pos = (x % self.width, y % self.height)
+                if pos in self._free:
+                    candidates.append(pos)
+
+        if not candidates:
+            return None
+        return random.choice(candidates)
+
+    def sample_empty_positions(self, count):
+        if count > len(self._free):
+            raise ValueError(f"Requested {count} empty positions, only {len(self._free)} available")
+        return self._free.sample(count)
+
+    def place_agents(self, agent_factory, count):
+        agents = []
+        for i, position in enumerate(self.sample_empty_positions(count)):
+            agents.append(agent_factory(self, position, i))
+        return agents
 
     def place_agent(self, agent, position):
         x, y = position
@@ -116,12 +354,14 @@ class Grid:
             raise ValueError(f"Cell ({x}, {y}) already occupied")
 
         cell.occupant = agent
+        self._mark_occupied(x, y)
         agent.position = (x, y)
 
     def remove_agent(self, position):
         x, y = position
         cell = self.get_cell(x, y)
         cell.occupant = None
+        self._mark_free(x, y)
 
     def move_agent(self, old_pos, new_pos):
         old_x, old_y = old_pos
@@ -139,8 +379,13 @@ class Grid:
         agent = old_cell.occupant
         old_cell.occupant = None
         new_cell.occupant = agent
+        self._mark_free(old_x, old_y)
+        self._mark_occupied(new_x, new_y)
         agent.position = new_pos
 
+        if self.move_listener:
+            self.move_listener(agent)
+
         return new_cell.stamina_cost
 
     def __repr__(self):
@@ -2,58 +2,235 @@ from grid import Grid
 from agents import Dek, Predator, Thia, Adversary, Monster
 from simulation import Simulation
 from visualizer import Visualizer
+import argparse
+import contextlib
+import json
+import os
 import random
+import time
 
 
-def main():
-    random.seed(42)
-    grid = Grid(25, 25)
-    thia = Thia(grid, position=(2, 2), is_damaged=True)
-    dek = Dek(grid, position=(1, 1), thia=thia)
-    father = Predator(grid, position=(3, 3), name="Father", role="elder")
-    brother = Predator(grid, position=(4, 4), name="Brother", role="peer")
-    adversary = Adversary(grid, position=(20, 20))
+DEFAULT_SCENARIO = {
+    "seed": 42,
+    "width": 25,
+    "height": 25,
+    "max_turns": 200,
+    "dek": {"position": [1, 1]},
+    "thia": {"position": [2, 2], "is_damaged": True},
+    "predators": [
+        {"position": [3, 3], "name": "Father", "role": "elder"},
+        {"position": [4, 4], "name": "Brother", "role": "peer"}
+    ],
+    "adversary": {"position": [20, 20]},
+    "monsters": [[10, 10], [15, 5], [5, 15], [12, 18], [8, 8]]
+}
+
+
+def load_scenario(path=None):
+    scenario = dict(DEFAULT_SCENARIO)
+    if path:
+        with open(path) as f:
+            scenario.update(json.load(f))
+    return scenario
+
+
+def build_simulation(scenario, world=None):
+    grid = Grid(scenario["width"], scenario["height"], world=world)
+
+    thia = None
+    if scenario.get("thia"):
+        thia_config = scenario["thia"]
+        thia = Thia(grid, position=tuple(thia_config["position"]), is_damaged=thia_config.get("is_damaged", True))
+
+    dek = Dek(grid, position=tuple(scenario["dek"]["position"]), thia=thia)
+
+    predators = []
+    for config in scenario.get("predators", []):
+        predators.append(Predator(grid, position=tuple(config["position"]),
+                                  name=config.get("name", "Predator"), role=config.get("role", "peer")))
+
+    adversary = Adversary(grid, position=tuple(scenario["adversary"]["position"]))
 
     monsters = []
-    monster_positions = [(10, 10), (15, 5), (5, 15), (12, 18), (8, 8)]
-    for i, pos in enumerate(monster_positions):
-        monsters.append(Monster(grid, position=pos, name=f"Monster_{i + 1}"))
+    for i, pos in enumerate(scenario.get("monsters", [])):
+        monsters.append(Monster(grid, position=tuple(pos), name=f"Monster_{i + 1}"))
 
-    sim = Simulation(grid=grid, dek=dek, thia=thia, predators=[father, brother], adversary=adversary, monsters=monsters)
-    viz = Visualizer(sim)
+    spawn_count = scenario.get("random_monsters", 0)
+    if spawn_count:
+        offset = len(monsters)
+        monsters.extend(grid.place_agents(
+            lambda g, pos, i: Monster(g, position=pos, name=f"Monster_{offset + i + 1}"), spawn_count))
+
+    return Simulation(grid=grid, dek=dek, thia=thia, predators=predators, adversary=adversary, monsters=monsters,
+                      batch_combat=scenario.get("batch_combat", False),
+                      cached_distances=scenario.get("cached_distances", False),
+                      line_of_sight=scenario.get("line_of_sight", False))
 
+
+def run(sim, viz, max_turns, show_grid=True):
     print("=" * 60)
     print("PREDATOR: BADLANDS SIMULATION")
     print("=" * 60)
     print(f"\nDek's Quest: Defeat the Ultimate Adversary and restore honor")
-    print(f"Grid Size: {grid.width}x{grid.height}")
-    print(f"Agents: Dek, Thia, {len(sim.predators)} Predators, {len(monsters)} Monsters, 1 Adversary")
+    print(f"Grid Size: {sim.grid.width}x{sim.grid.height}")
+    print(f"Agents: Dek, Thia, {len(sim.predators)} Predators, {len(sim.monsters)} Monsters, 1 Adversary")
     print("=" * 60)
 
-    max_turns = 200
     for turn in range(1, max_turns + 1):
         print(f"\n--- Turn {turn} ---")
         continue_sim = sim.step()
 
         if turn % 10 == 0 or not continue_sim:
             viz.display_stats()
-            viz.display_grid()
+            if show_grid:
+                viz.display_grid()
 
         if not continue_sim:
             print("\n" + "=" * 60)
             print("SIMULATION COMPLETE")
             print("=" * 60)
-            sim.print_final_report()
             break
     else:
         print("\n" + "=" * 60)
         print("SIMULATION ENDED - Maximum turns reached")
         print("=" * 60)
-        sim.print_final_report()
 
-    viz.display_grid()
-    viz.plot_statistics()
+
+def run_realtime(sim, max_turns, fps, budget_fraction=0.8):
+    frame = 1.0 / fps
+    frame_start = time.perf_counter()
+    frames = 0
+
+    while not sim.finished and (sim.turn < max_turns or sim.mid_turn):
+        remaining = max_turns - sim.turn + (1 if sim.mid_turn else 0)
+        sim.step_until(frame_start + frame * budget_fraction, max_turns=remaining)
+        frames += 1
+
+        frame_start += frame
+        delay = frame_start - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            frame_start = time.perf_counter()
+
+    return frames
+
+
+def print_latency_report(sim, frames, fps):
+    latencies = sim.latency_percentiles()
+    print(f"Realtime: {frames} frames at {fps} fps, {sim.turn} turns")
+    print("Turn latency: " + " | ".join(f"p{p} {value * 1000:.2f} ms" for p, value in latencies.items()))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Predator: Badlands simulation")
+    parser.add_argument("--scenario", help="path to a JSON scenario file")
+    parser.add_argument("--seed", type=int, help="override the scenario random seed")
+    parser.add_argument("--max-turns", type=int, help="override the scenario turn limit")
+    parser.add_argument("--headless", action="store_true", help="skip grid snapshots and the statistics plot")
+    parser.add_argument("--quiet", action="store_true", help="suppress turn-by-turn output, print only the final report")
+    parser.add_argument("--world", help="path to a prebuilt world file to run on")
+    parser.add_argument("--save-world", metavar="PATH", help="generate the scenario's world into a world file and exit")
+    parser.add_argument("--realtime", type=float, metavar="FPS", help="spread turns across frames at this frame rate")
+    parser.add_argument("--record", metavar="PATH", help="record per-turn frames to a frame archive")
+    parser.add_argument("--export", metavar="PATH", help="render recorded frames to a .gif or video (needs --record)")
+    parser.add_argument("--log-dir", metavar="DIR", help="write a clan-code event log for each run into DIR")
+    parser.add_argument("--runs", type=int, default=1, help="run this many seeds on one shared world")
+    parser.add_argument("--workers", type=int, help="worker processes for multi-run mode")
+    args = parser.parse_args(argv)
+
+    if args.export and not args.record:
+        parser.error("--export needs --record")
+
+    if args.runs > 1:
+        for flag, value in (("--realtime", args.realtime), ("--record", args.record)):
+            if value:
+                parser.error(f"{flag} cannot be combined with --runs")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenario = load_scenario(args.scenario)
+
+    if args.seed is not None:
+        scenario["seed"] = args.seed
+    if args.max_turns is not None:
+        scenario["max_turns"] = args.max_turns
+
+    if args.save_world:
+        from world import save_world
+        save_world(args.save_world, scenario)
+        print(f"World saved to '{args.save_world}' ({scenario['width']}x{scenario['height']})")
+        return
+
+    world = None
+    if args.world:
+        from world import WorldFile
+        world = WorldFile(args.world)
+        scenario = world.scenario(scenario)
+
+    if args.log_dir:
+        os.makedirs(args.log_dir, exist_ok=True)
+
+    if args.runs > 1:
+        from montecarlo import run_monte_carlo, print_summary
+        seeds = range(scenario["seed"], scenario["seed"] + args.runs)
+        print_summary(run_monte_carlo(scenario, seeds, workers=args.workers, world_path=args.world,
+                                      log_dir=args.log_dir))
+        if world:
+            world.close()
+        return
+
+    random.seed(scenario["seed"])
+    sim = build_simulation(scenario, world=world.layers if world else None)
+    viz = Visualizer(sim)
+
+    if args.log_dir:
+        from events import EventLog, run_log_path
+        sim.event_log = EventLog(run_log_path(args.log_dir, scenario["seed"]), seed=scenario["seed"])
+
+    recorder = None
+    if args.record:
+        from recorder import FrameRecorder
+        recorder = FrameRecorder(sim, args.record)
+        recorder.capture()
+        sim.turn_listener = lambda _: recorder.capture()
+
+    if args.realtime:
+        if args.quiet:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                frames = run_realtime(sim, scenario["max_turns"], args.realtime)
+        else:
+            frames = run_realtime(sim, scenario["max_turns"], args.realtime)
+    elif args.quiet:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            run(sim, viz, scenario["max_turns"], show_grid=not args.headless)
+    else:
+        run(sim, viz, scenario["max_turns"], show_grid=not args.headless)
+
+    sim.print_final_report()
+
+    if sim.event_log:
+        sim.event_log.close(sim)
+
+    if recorder:
+        recorder.close()
+        if args.export:
+            from recorder import export_animation
+            count = export_animation(args.record, args.export)
+            print(f"Rendered {count} frames to '{args.export}'")
+
+    if args.realtime:
+        print_latency_report(sim, frames, args.realtime)
+
+    if not args.headless:
+        viz.display_grid()
+        viz.plot_statistics()
+
+    if world:
+        world.close()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
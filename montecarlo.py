@@ -0,0 +1,84 @@
+from multiprocessing import Pool
+import contextlib
+import os
+import random
+
+from main import build_simulation
+from events import EventLog, run_log_path
+from world import SharedWorld, WorldFile
+
+
+_world = None
+
+
+def _attach_world(handle):
+    global _world
+    _world = SharedWorld.attach(handle)
+
+
+def _open_world_file(path):
+    global _world
+    _world = WorldFile(path)
+
+
+def summarize_run(sim, seed):
+    return {
+        "seed": seed,
+        "turns": sim.turn,
+        "victory": sim.victory,
+        "defeat": sim.defeat,
+        "dek_health": sim.dek.health,
+        "dek_reputation": sim.dek.reputation,
+        "clan_honor": sim.clan_honor,
+        "monsters_alive": sim.alive_counts.get("Monster", 0),
+        "fallen": len(sim.fallen)
+    }
+
+
+def _run_seed(job):
+    scenario, seed, log_dir = job
+    random.seed(seed)
+    sim = build_simulation(scenario, world=_world.layers)
+    if log_dir:
+        sim.event_log = EventLog(run_log_path(log_dir, seed), seed=seed)
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        for _ in range(scenario["max_turns"]):
+            if not sim.step():
+                break
+
+    if sim.event_log:
+        sim.event_log.close(sim)
+
+    return summarize_run(sim, seed)
+
+
+def run_monte_carlo(scenario, seeds, workers=None, world_path=None, log_dir=None):
+    jobs = [(scenario, seed, log_dir) for seed in seeds]
+
+    if world_path:
+        with Pool(workers, initializer=_open_world_file, initargs=(world_path,)) as pool:
+            return pool.map(_run_seed, jobs)
+
+    random.seed(scenario["seed"])
+    with SharedWorld.generate(scenario["width"], scenario["height"]) as world:
+        with Pool(workers, initializer=_attach_world, initargs=(world.handle,)) as pool:
+            return pool.map(_run_seed, jobs)
+
+
+def print_summary(results):
+    print("=" * 60)
+    print("MONTE CARLO SUMMARY")
+    print("=" * 60)
+    for r in results:
+        outcome = "VICTORY" if r["victory"] else "DEFEAT" if r["defeat"] else "INCOMPLETE"
+        print(f"Seed {r['seed']:>6}: {outcome:<10} turns={r['turns']:<4} "
+              f"health={r['dek_health']:<3} reputation={r['dek_reputation']:<4} honor={r['clan_honor']}")
+
+    runs = len(results)
+    victories = sum(1 for r in results if r["victory"])
+    defeats = sum(1 for r in results if r["defeat"])
+    print("-" * 60)
+    print(f"Runs: {runs} | Victories: {victories} | Defeats: {defeats} | "
+          f"Incomplete: {runs - victories - defeats}")
+    print("=" * 60)
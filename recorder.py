@@ -0,0 +1,261 @@
+from multiprocessing import Pool
+import argparse
+import shutil
+import struct
+import subprocess
+
+import numpy as np
+
+from agents import AGENT_TYPE_CODES
+from grid import TERRAIN_CODES, TerrainType
+
+
+FRAME_MAGIC = b"BADFRAME"
+FRAME_VERSION = 1
+FRAME_HEADER = struct.Struct("<8sIII")
+FRAME_RECORD = struct.Struct("<II")
+
+AGENT_PALETTE_OFFSET = 8
+
+TERRAIN_COLORS = {
+    TerrainType.EMPTY: (222, 200, 160),
+    TerrainType.DESERT_CANYON: (196, 146, 88),
+    TerrainType.ROCKY_ZONE: (120, 112, 104),
+    TerrainType.TRAP: (150, 40, 40),
+    TerrainType.HOSTILE_TERRAIN: (88, 60, 84)
+}
+
+AGENT_COLORS = {
+    "Dek": (30, 90, 220),
+    "Thia": (70, 210, 230),
+    "Predator": (40, 160, 60),
+    "Monster": (255, 140, 0),
+    "Adversary": (15, 15, 15)
+}
+
+
+def build_palette():
+    palette = np.zeros((256, 3), dtype=np.uint8)
+    for terrain, color in TERRAIN_COLORS.items():
+        palette[TERRAIN_CODES[terrain]] = color
+    for agent_type, color in AGENT_COLORS.items():
+        palette[AGENT_PALETTE_OFFSET + AGENT_TYPE_CODES[agent_type]] = color
+    return palette
+
+
+class FrameRecorder:
+
+    def __init__(self, simulation, path):
+        self.sim = simulation
+        self.path = path
+        self.frames = 0
+
+        grid = simulation.grid
+        self.width = grid.width
+        self.height = grid.height
+
+        if grid.is_lazy:
+            terrain = grid.world.terrain
+        else:
+            terrain = bytearray(grid.width * grid.height)
+            for x in range(grid.width):
+                column = grid.cells[x]
+                for y in range(grid.height):
+                    terrain[x * grid.height + y] = TERRAIN_CODES[column[y].terrain]
+
+        self.file = open(path, "wb")
+        self.file.write(FRAME_HEADER.pack(FRAME_MAGIC, FRAME_VERSION, grid.width, grid.height))
+        self.file.write(terrain)
+
+    def capture(self):
+        xs, ys, codes = [], [], []
+        for agent in self.sim.get_live_agents():
+            if agent.is_alive:
+                x, y = agent.position
+                xs.append(x % self.width)
+                ys.append(y % self.height)
+                codes.append(AGENT_TYPE_CODES.get(type(agent).__name__, 0))
+
+        self.file.write(FRAME_RECORD.pack(self.sim.turn, len(codes)))
+        self.file.write(np.array(xs, dtype=np.int32).tobytes())
+        self.file.write(np.array(ys, dtype=np.int32).tobytes())
+        self.file.write(np.array(codes, dtype=np.uint8).tobytes())
+        self.frames += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class FrameArchive:
+
+    def __init__(self, path, index_frames=True):
+        self.path = path
+        self.frames = []
+
+        with open(path, "rb") as f:
+            magic, version, width, height = FRAME_HEADER.unpack(f.read(FRAME_HEADER.size))
+            if magic != FRAME_MAGIC:
+                raise ValueError(f"{path} is not a frame archive")
+            if version != FRAME_VERSION:
+                raise ValueError(f"{path} has unsupported frame archive version {version}")
+
+            self.width = width
+            self.height = height
+            self.terrain_offset = FRAME_HEADER.size
+
+            if not index_frames:
+                return
+
+            offset = self.terrain_offset + width * height
+            f.seek(offset)
+            while True:
+                record = f.read(FRAME_RECORD.size)
+                if len(record) < FRAME_RECORD.size:
+                    break
+                turn, count = FRAME_RECORD.unpack(record)
+                self.frames.append((turn, offset + FRAME_RECORD.size, count))
+                offset += FRAME_RECORD.size + count * 9
+                f.seek(offset)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def read_terrain(self):
+        with open(self.path, "rb") as f:
+            f.seek(self.terrain_offset)
+            data = f.read(self.width * self.height)
+        return np.frombuffer(data, dtype=np.uint8).reshape(self.width, self.height).T.copy()
+
+    def read_frame(self, f, offset, count):
+        f.seek(offset)
+        data = f.read(count * 9)
+        xs = np.frombuffer(data, dtype=np.int32, count=count)
+        ys = np.frombuffer(data, dtype=np.int32, count=count, offset=count * 4)
+        codes = np.frombuffer(data, dtype=np.uint8, count=count, offset=count * 8)
+        return xs, ys, codes
+
+
+_archive = None
+_terrain = None
+_file = None
+
+
+def _open_archive(path):
+    global _archive, _terrain, _file
+    _archive = FrameArchive(path, index_frames=False)
+    _terrain = _archive.read_terrain()
+    _file = open(path, "rb")
+
+
+def _render_indices(offset, count, scale):
+    xs, ys, codes = _archive.read_frame(_file, offset, count)
+    image = _terrain.copy()
+    image[ys, xs] = AGENT_PALETTE_OFFSET + codes
+    if scale > 1:
+        image = np.repeat(np.repeat(image, scale, axis=0), scale, axis=1)
+    return image
+
+
+def _render_gif_frame(job):
+    from PIL import GifImagePlugin, Image
+
+    offset, count, scale, duration = job
+    image = Image.fromarray(_render_indices(offset, count, scale), mode="P")
+    image.putpalette(build_palette().tobytes())
+    return b"".join(GifImagePlugin.getdata(image, duration=duration, disposal=1))
+
+
+def _render_rgb_frame(job):
+    offset, count, scale = job
+    return build_palette()[_render_indices(offset, count, scale)].tobytes()
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def export_gif(archive_path, output_path, fps=10, scale=4, workers=None, chunk_size=64):
+    from PIL import GifImagePlugin, Image
+
+    archive = FrameArchive(archive_path)
+    if not archive.frames:
+        raise ValueError(f"{archive_path} contains no frames")
+
+    duration = int(1000 / fps)
+    size = (archive.width * scale, archive.height * scale)
+    first = Image.new("P", size)
+    first.putpalette(build_palette().tobytes())
+    header, _ = GifImagePlugin.getheader(first)
+    header[0] = b"GIF89a" + bytes(header[0])[6:]
+
+    jobs = [(offset, count, scale, duration) for _, offset, count in archive.frames]
+
+    with open(output_path, "wb") as out, \
+            Pool(workers, initializer=_open_archive, initargs=(archive_path,)) as pool:
+        for fragment in header:
+            out.write(fragment)
+        out.write(b"!\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+        for chunk in _chunks(jobs, chunk_size):
+            for frame in pool.map(_render_gif_frame, chunk):
+                out.write(frame)
+
+        out.write(b";")
+
+    return len(jobs)
+
+
+def export_video(archive_path, output_path, fps=10, scale=4, workers=None, chunk_size=64):
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg is None:
+        raise RuntimeError("ffmpeg is required for video export")
+
+    archive = FrameArchive(archive_path)
+    width, height = archive.width * scale, archive.height * scale
+    jobs = [(offset, count, scale) for _, offset, count in archive.frames]
+
+    command = [ffmpeg, "-y", "-loglevel", "error", "-f", "rawvideo", "-pix_fmt", "rgb24",
+               "-s", f"{width}x{height}", "-r", str(fps), "-i", "-",
+               "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2", "-pix_fmt", "yuv420p", output_path]
+
+    with subprocess.Popen(command, stdin=subprocess.PIPE) as encoder, \
+            Pool(workers, initializer=_open_archive, initargs=(archive_path,)) as pool:
+        for chunk in _chunks(jobs, chunk_size):
+            for frame in pool.map(_render_rgb_frame, chunk):
+                encoder.stdin.write(frame)
+        encoder.stdin.close()
+
+    if encoder.returncode:
+        raise RuntimeError(f"ffmpeg exited with status {encoder.returncode}")
+
+    return len(jobs)
+
+
+def export_animation(archive_path, output_path, **options):
+    if output_path.lower().endswith(".gif"):
+        return export_gif(archive_path, output_path, **options)
+    return export_video(archive_path, output_path, **options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a recorded frame archive to an animation")
+    parser.add_argument("frames", help="frame archive written by FrameRecorder")
+    parser.add_argument("output", help="output .gif, or any video format ffmpeg understands")
+    parser.add_argument("--fps", type=float, default=10)
+    parser.add_argument("--scale", type=int, default=4, help="pixels per grid cell")
+    parser.add_argument("--workers", type=int, help="render processes")
+    args = parser.parse_args(argv)
+
+    count = export_animation(args.frames, args.output, fps=args.fps, scale=args.scale, workers=args.workers)
+    print(f"Rendered {count} frames to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,34 @@
+from collections import deque
+import time
+
+from agents import Monster, Predator
+
+
 class YautjaClanCode:
 
+    HUNT_WORTHY_MIN_HEALTH = 20
+    HUNT_WORTHY_HEALTH_FRACTION = 0.3
+    UNWORTHY_HEALTH = 15
+
+    UNWORTHY_PREY = "Hunted unworthy prey"
+    HARMED_UNWORTHY = "Harmed the unworthy"
+
+    @staticmethod
+    def is_hunt_worthy(health, max_health):
+        return ((health > YautjaClanCode.HUNT_WORTHY_MIN_HEALTH)
+                & (health > max_health * YautjaClanCode.HUNT_WORTHY_HEALTH_FRACTION))
+
+    @staticmethod
+    def is_harm_worthy(health):
+        return health >= YautjaClanCode.UNWORTHY_HEALTH
+
     @staticmethod
     def check_hunt_worthy(target):
-        return target.health > 20 and hasattr(target, 'max_health') and target.health > target.max_health * 0.3
+        return hasattr(target, 'max_health') and bool(YautjaClanCode.is_hunt_worthy(target.health, target.max_health))
 
     @staticmethod
     def check_fighting_chance(hunter, target):
-        return target.is_alive and target.health > 15
+        return target.is_alive and target.health > YautjaClanCode.UNWORTHY_HEALTH
 
     @staticmethod
     def check_territory_respect(agent, other_trophies):
@@ -14,7 +36,7 @@ class YautjaClanCode:
 
     @staticmethod
     def check_harm_unworthy(target):
-        if hasattr(target, 'health') and target.health < 15:
+        if hasattr(target, 'health') and not YautjaClanCode.is_harm_worthy(target.health):
             return False
         return True
 
@@ -24,16 +46,19 @@ class YautjaClanCode:
 
         if action == "hunt" and target:
             if not YautjaClanCode.check_hunt_worthy(target):
-                violations.append("Hunted unworthy prey")
+                violations.append(YautjaClanCode.UNWORTHY_PREY)
             if not YautjaClanCode.check_harm_unworthy(target):
-                violations.append("Harmed the unworthy")
+                violations.append(YautjaClanCode.HARMED_UNWORTHY)
 
         return violations
 
 
 class Simulation:
 
-    def __init__(self, grid, dek, thia, predators, adversary, monsters):
+    LOGGED_ACTIONS = ("hunt", "fight", "attack", "challenge")
+
+    def __init__(self, grid, dek, thia, predators, adversary, monsters, batch_combat=False,
+                 cached_distances=False, line_of_sight=False):
         self.grid = grid
         self.dek = dek
         self.thia = thia
@@ -46,6 +71,29 @@ class Simulation:
         self.clan_code = YautjaClanCode()
         self.victory = False
         self.defeat = False
+        self.finished = False
+        self.event_log = None
+        self.turn_listener = None
+
+        self._pending_turn = None
+        self._pending_elapsed = 0.0
+        self.turn_latencies = deque(maxlen=1024)
+
+        self.combat = None
+        if batch_combat:
+            from combat import CombatResolver
+            self.combat = CombatResolver(self)
+
+        self.distances = None
+        if cached_distances:
+            from distances import DistanceCache
+            self.distances = DistanceCache(grid, self.get_all_agents())
+            grid.move_listener = self.distances.mark_moved
+
+        self.visibility = None
+        if line_of_sight:
+            from visibility import VisibilityMap
+            self.visibility = VisibilityMap(grid)
 
         self.stats = {
             "dek_kills": 0,
@@ -53,58 +101,279 @@ class Simulation:
             "dek_damage_taken": 0,
             "dek_damage_dealt": 0,
             "honor_changes": [],
-            "reputation_changes": []
+            "reputation_changes": [],
+            "kills_by_type": {},
+            "damage_by_type": {}
         }
 
-    def step(self):
+        self.live_predators = list(predators)
+        self.live_monsters = list(monsters)
+        self.fallen = []
+        self.alive_counts = {}
+        self._acting_agent = None
+        self._deaths_pending = False
+        self._live_agents = None
+
+        for agent in self.get_all_agents():
+            self._register(agent)
+
+    def _register(self, agent):
+        agent.damage_listener = self._record_damage
+        if agent.is_alive:
+            agent_type = type(agent).__name__
+            self.alive_counts[agent_type] = self.alive_counts.get(agent_type, 0) + 1
+
+    def _add_agents(self, agents):
+        for agent in agents:
+            if isinstance(agent, Predator):
+                self.predators.append(agent)
+                self.live_predators.append(agent)
+            elif isinstance(agent, Monster):
+                self.monsters.append(agent)
+                self.live_monsters.append(agent)
+            else:
+                raise ValueError(f"Cannot add a {type(agent).__name__} to a running simulation")
+            self._register(agent)
+
+        self._live_agents = None
+        if self.distances:
+            self.distances.add(agents)
+
+    def add_agent(self, agent):
+        self._add_agents([agent])
+
+    def spawn_monsters(self, count):
+        offset = len(self.monsters)
+        monsters = self.grid.place_agents(
+            lambda grid, pos, i: Monster(grid, position=pos, name=f"Monster_{offset + i + 1}"), count)
+        self._add_agents(monsters)
+        return monsters
+
+    def _record_damage(self, agent, amount, died):
+        agent_type = type(agent).__name__
+        damage_by_type = self.stats["damage_by_type"]
+        damage_by_type[agent_type] = damage_by_type.get(agent_type, 0) + amount
+
+        attacker = self._acting_agent
+        if attacker is agent:
+            attacker = None
+
+        if attacker is self.dek:
+            self.stats["dek_damage_dealt"] += amount
+
+        if not died:
+            return
+
+        if self.distances:
+            self.distances.mark_dead(agent)
+
+        self.alive_counts[agent_type] -= 1
+        kills_by_type = self.stats["kills_by_type"]
+        kills_by_type[agent_type] = kills_by_type.get(agent_type, 0) + 1
+
+        if attacker is self.dek:
+            self.stats["dek_kills"] += 1
+        elif isinstance(attacker, Predator):
+            self.stats["predator_kills"] += 1
+
+        self.fallen.append({
+            "name": agent.name,
+            "type": agent_type,
+            "turn": self.turn,
+            "killed_by": attacker.name if attacker else None
+        })
+        self._deaths_pending = True
+
+    def _compact(self):
+        self.live_predators = [p for p in self.live_predators if p.is_alive]
+        self.live_monsters = [m for m in self.live_monsters if m.is_alive]
+        self._live_agents = None
+        self._deaths_pending = False
+
+    def _run_turn(self, dek_action=None):
         self.turn += 1
 
         if not self.dek.is_alive:
             print("\n*** DEK HAS FALLEN. Quest failed. ***")
             self.defeat = True
+            self.finished = True
             return False
 
         if not self.adversary.is_alive:
             print("\n*** ADVERSARY DEFEATED! Dek's honor restored! ***")
             self.victory = True
+            self.finished = True
             return False
 
+        if self.distances:
+            self.distances.refresh()
+
         if self.dek.is_alive:
-            action = self.dek.decide_action(self)
+            self._acting_agent = self.dek
+            action = dek_action if dek_action is not None else self.dek.decide_action(self)
             old_health = self.dek.health
-            self.dek.execute_action(action, self)
+            self._execute(self.dek, action)
 
             if self.dek.health < old_health:
                 self.stats["dek_damage_taken"] += (old_health - self.dek.health)
 
-            if action.get("type") == "hunt":
-                violations = self.clan_code.evaluate_violation(self.dek, "hunt", action.get("target"))
-                if violations:
-                    self.dek.reputation -= 10
-                    self.clan_honor -= 5
-                    print(f"Clan Code Violation: {', '.join(violations)}")
-                    print(f"Dek's reputation decreased to {self.dek.reputation}")
+            yield
 
         if self.thia and self.thia.is_alive:
+            self._acting_agent = self.thia
             thia_action = self.thia.decide_action(self)
-            self.thia.execute_action(thia_action, self)
+            self._execute(self.thia, thia_action)
+            yield
 
-        for predator in self.predators:
+        for predator in self.live_predators:
             if predator.is_alive:
+                self._acting_agent = predator
                 predator_action = predator.decide_action(self)
-                predator.execute_action(predator_action, self)
+                self._execute(predator, predator_action)
+                yield
 
-        for monster in self.monsters:
+        for monster in self.live_monsters:
             if monster.is_alive:
+                self._acting_agent = monster
                 monster_action = monster.decide_action(self)
-                monster.execute_action(monster_action, self)
+                self._execute(monster, monster_action)
+                yield
 
         if self.adversary.is_alive:
+            self._acting_agent = self.adversary
             adversary_action = self.adversary.decide_action(self)
-            self.adversary.execute_action(adversary_action, self)
+            self._execute(self.adversary, adversary_action)
+            yield
+
+        if self.combat:
+            self.combat.resolve()
+
+        self._acting_agent = None
+        if self._deaths_pending:
+            self._compact()
+
+        if self.event_log:
+            self.event_log.record({
+                "event": "turn",
+                "turn": self.turn,
+                "clan_honor": self.clan_honor,
+                "reputation": self.dek.reputation,
+                "dek_health": self.dek.health
+            })
 
         return True
 
+    def judge_hunt(self, hunter, target):
+        reputation = self.dek.reputation
+        violations = self.clan_code.evaluate_violation(hunter, "hunt", target)
+        if violations:
+            self.dek.reputation -= 10
+            self.clan_honor -= 5
+            print(f"Clan Code Violation: {', '.join(violations)}")
+            print(f"Dek's reputation decreased to {self.dek.reputation}")
+
+        if self.event_log:
+            self.event_log.record({
+                "event": "verdict",
+                "turn": self.turn,
+                "agent": hunter.name,
+                "agent_type": type(hunter).__name__,
+                "action": "hunt",
+                "target": target.name,
+                "target_health": target.health,
+                "violations": violations,
+                "reputation": self.dek.reputation,
+                "reputation_delta": self.dek.reputation - reputation
+            })
+        return violations
+
+    def _execute(self, agent, action):
+        if self.event_log is None or action.get("type") not in self.LOGGED_ACTIONS:
+            agent.execute_action(action, self)
+            return
+
+        target = action["target"]
+        reputation = self.dek.reputation
+        event = {
+            "event": "action",
+            "turn": self.turn,
+            "agent": agent.name,
+            "agent_type": type(agent).__name__,
+            "action": action["type"],
+            "target": target.name,
+            "target_type": type(target).__name__,
+            "target_health": target.health,
+            "target_max_health": target.max_health
+        }
+
+        agent.execute_action(action, self)
+
+        if self.combat is None:
+            event["target_health_after"] = target.health
+        event["reputation_delta"] = self.dek.reputation - reputation
+        self.event_log.record(event)
+
+    def _advance(self, dek_action=None):
+        if self._pending_turn is None:
+            self._pending_turn = self._run_turn(dek_action)
+            self._pending_elapsed = 0.0
+
+        started = time.perf_counter()
+        try:
+            next(self._pending_turn)
+        except StopIteration as done:
+            self._pending_elapsed += time.perf_counter() - started
+            self.turn_latencies.append(self._pending_elapsed)
+            self._pending_turn = None
+            if self.turn_listener:
+                self.turn_listener(self)
+            return True, done.value
+
+        self._pending_elapsed += time.perf_counter() - started
+        return False, None
+
+    def step(self, dek_action=None):
+        if dek_action is not None and self._pending_turn is not None:
+            raise RuntimeError(f"Turn {self.turn} is already in progress; finish it before passing a Dek action")
+
+        while True:
+            completed, result = self._advance(dek_action)
+            if completed:
+                return result
+
+    def step_until(self, deadline, max_turns=None):
+        turns_completed = 0
+
+        while not self.finished and time.perf_counter() < deadline:
+            if max_turns is not None and turns_completed >= max_turns and self._pending_turn is None:
+                break
+
+            completed, result = self._advance()
+            if completed:
+                turns_completed += 1
+                if not result:
+                    break
+
+        return turns_completed
+
+    def step_for(self, budget, max_turns=None):
+        return self.step_until(time.perf_counter() + budget, max_turns=max_turns)
+
+    @property
+    def mid_turn(self):
+        return self._pending_turn is not None
+
+    def latency_percentiles(self, percentiles=(50, 90, 99)):
+        if not self.turn_latencies:
+            return {p: 0.0 for p in percentiles}
+
+        ordered = sorted(self.turn_latencies)
+        result = {}
+        for p in percentiles:
+            rank = max(0, min(len(ordered) - 1, int(round(p / 100 * len(ordered))) - 1))
+            result[p] = ordered[rank]
+        return result
+
     def get_all_agents(self):
         agents = [self.dek]
 
@@ -117,6 +386,60 @@ class Simulation:
 
         return agents
 
+    def distance(self, a, b):
+        if self.distances:
+            return self.distances.get(a, b)
+        return self.grid.get_distance(a.position, b.position)
+
+    def nearest(self, agent, candidates):
+        if not candidates:
+            return None, float('inf')
+
+        if self.distances:
+            return self.distances.nearest(agent, candidates)
+
+        closest = min(candidates, key=lambda c: self.grid.get_distance(agent.position, c.position))
+        return closest, self.grid.get_distance(agent.position, closest.position)
+
+    def nearest_live_agent(self, agent):
+        if self.distances:
+            return self.distances.nearest_alive(agent)
+
+        nearest_agent = None
+        min_dist = float('inf')
+
+        for other in self.get_live_agents():
+            if other != agent and other.is_alive:
+                dist = self.grid.get_distance(agent.position, other.position)
+                if dist < min_dist:
+                    min_dist = dist
+                    nearest_agent = other
+
+        return nearest_agent, min_dist
+
+    def visible_agents(self, agent, radius):
+        return self.visibility.visible_agents(agent.position, radius, exclude=agent)
+
+    def nearest_visible_agent(self, agent, radius):
+        return self.nearest(agent, self.visible_agents(agent, radius))
+
+    def get_live_agents(self):
+        if self._deaths_pending:
+            self._compact()
+
+        if self._live_agents is None:
+            agents = [self.dek]
+
+            if self.thia:
+                agents.append(self.thia)
+
+            agents.extend(self.live_predators)
+            agents.extend(self.live_monsters)
+            agents.append(self.adversary)
+            self._live_agents = agents
+
+        return self._live_agents
+
     def print_final_report(self):
         print("\n" + "=" * 60)
         print("FINAL REPORT")
@@ -128,6 +451,7 @@ class Simulation:
         print(f"Dek Trophies: {len(self.dek.trophies)} - {self.dek.trophies}")
         print(f"Clan Honor: {self.clan_honor}")
         print(f"Adversary Status: {'DEFEATED' if not self.adversary.is_alive else 'ALIVE'}")
+        print(f"Fallen: {len(self.fallen)} - {[f['name'] for f in self.fallen]}")
 
         if self.victory:
             print("\n*** VICTORY: Dek has restored his honor! ***")
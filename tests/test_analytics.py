@@ -0,0 +1,26 @@
+import random
+
+from analytics import analyze
+from events import EventLog
+from main import build_simulation, load_scenario
+
+
+def test_unworthy_hunt_is_counted_as_enforced(tmp_path):
+    random.seed(1)
+    sim = build_simulation(load_scenario())
+    path = str(tmp_path / "run.jsonl")
+    sim.event_log = EventLog(path, seed=1)
+
+    monster = sim.monsters[0]
+    monster.health = 10
+    sim.step({"type": "hunt", "target": monster})
+    sim.event_log.close(sim)
+
+    assert sim.dek.reputation == 40
+    assert sim.clan_honor == 45
+
+    rows = {(row["agent_type"], row["action"]): row for row in analyze([path]).violation_table()}
+    dek = rows[("Dek", "hunt")]
+    assert dek["attempts"] == 1
+    assert dek["unworthy_hunts"] == 1
+    assert dek["harmed_unworthy"] == 1
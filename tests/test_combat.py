@@ -0,0 +1,51 @@
+import random
+
+import numpy as np
+
+from combat import CombatResolver
+from main import build_simulation, load_scenario
+
+
+def test_landed_damage_caps_at_remaining_health():
+    resolver = CombatResolver(None)
+    ids = np.array([0, 1, 0, 0, 2], dtype=np.int64)
+    damage = np.array([30, 10, 50, 40, 5], dtype=np.int64)
+    health = np.array([60, 100, 0], dtype=np.int64)
+
+    landed, kills = resolver._landed_damage(ids, damage, health)
+
+    assert landed.tolist() == [30, 10, 30, 0, 0]
+    assert kills.tolist() == [False, False, True, False, False]
+
+
+def test_landed_damage_skips_misses_before_the_kill():
+    resolver = CombatResolver(None)
+    ids = np.array([1, 0, 1, 1], dtype=np.int64)
+    damage = np.array([0, 20, 25, 25], dtype=np.int64)
+    health = np.array([20, 40], dtype=np.int64)
+
+    landed, kills = resolver._landed_damage(ids, damage, health)
+
+    assert landed.tolist() == [0, 20, 25, 15]
+    assert kills.tolist() == [False, True, False, True]
+
+
+def test_batched_kill_applies_hunt_penalty():
+    for seed in range(100):
+        random.seed(seed)
+        scenario = load_scenario()
+        scenario["batch_combat"] = True
+        sim = build_simulation(scenario)
+
+        monster = sim.monsters[0]
+        monster.health = 25
+        sim.dek.execute_action({"type": "hunt", "target": monster}, sim)
+        sim.combat.resolve()
+
+        if not monster.is_alive:
+            break
+
+    assert not monster.is_alive
+    assert sim.dek.trophies == [monster.name]
+    assert sim.dek.reputation == 50
+    assert sim.clan_honor == 50
@@ -0,0 +1,183 @@
+import contextlib
+import os
+import random
+
+import numpy as np
+
+from agents import AGENT_TYPE_CODES
+from grid import Grid, TERRAIN_CODES
+from main import build_simulation, load_scenario
+from world import WorldLayers
+
+
+ACTION_REST = 0
+ACTION_HUNT = 9
+ACTION_FIGHT = 10
+ACTION_CARRY_THIA = 11
+MOVE_DIRECTIONS = Grid.CARDINAL_DIRECTIONS + Grid.DIAGONAL_DIRECTIONS
+NUM_ACTIONS = 12
+
+REWARD_WEIGHTS = {
+    "reputation": 1.0,
+    "damage_dealt": 0.1,
+    "damage_taken": -0.1,
+    "victory": 100.0,
+    "defeat": -100.0
+}
+
+
+class BadlandsVectorEnv:
+
+    def __init__(self, num_envs, scenario=None, window_radius=5, fixed_world=False, seed=None):
+        self.num_envs = num_envs
+        self.scenario = scenario or load_scenario()
+        self.window_radius = window_radius
+        self.width = self.scenario["width"]
+        self.height = self.scenario["height"]
+        self.max_turns = self.scenario["max_turns"]
+
+        if seed is not None:
+            random.seed(seed)
+
+        self.world = None
+        if fixed_world:
+            buffer = bytearray(WorldLayers.nbytes(self.width, self.height))
+            WorldLayers.generate(self.width, self.height, buffer)
+            self.world = WorldLayers(self.width, self.height, buffer)
+
+        self.sims = [None] * num_envs
+        self.terrain = np.zeros((num_envs, self.width, self.height), dtype=np.int8)
+        self.occupancy = np.zeros((num_envs, self.width, self.height), dtype=np.int8)
+        self.episode_returns = np.zeros(num_envs, dtype=np.float64)
+
+        offsets = np.arange(-window_radius, window_radius + 1)
+        self._offsets = offsets
+        self._env_index = np.arange(num_envs)[:, None, None]
+
+        self._last = np.zeros((num_envs, 4), dtype=np.float64)
+
+    def _build(self, i):
+        with self._silenced():
+            sim = build_simulation(self.scenario, world=self.world)
+        self.sims[i] = sim
+
+        if self.world is not None:
+            self.terrain[i] = np.frombuffer(self.world.terrain, dtype=np.uint8).reshape(self.width, self.height)
+        else:
+            self.terrain[i] = [[TERRAIN_CODES[cell.terrain] for cell in column] for column in sim.grid.cells]
+
+        self._last[i] = self._tracked(sim)
+        self.episode_returns[i] = 0.0
+
+    def _silenced(self):
+        devnull = open(os.devnull, "w")
+        stack = contextlib.ExitStack()
+        stack.enter_context(devnull)
+        stack.enter_context(contextlib.redirect_stdout(devnull))
+        return stack
+
+    def _tracked(self, sim):
+        return (sim.dek.reputation, sim.stats["dek_damage_dealt"],
+                sim.dek.max_health - sim.dek.health, sim.adversary.health)
+
+    def _defeated_by_dek(self, sim):
+        for fallen in reversed(sim.fallen):
+            if fallen["name"] == sim.adversary.name:
+                return fallen["killed_by"] == sim.dek.name
+        return False
+
+    def reset(self):
+        for i in range(self.num_envs):
+            self._build(i)
+        return self._observe()
+
+    def _to_dek_action(self, sim, action):
+        dek = sim.dek
+
+        if 1 <= action <= len(MOVE_DIRECTIONS):
+            return {"type": "step", "direction": MOVE_DIRECTIONS[action - 1]}
+
+        if action == ACTION_HUNT:
+            target, dist = sim.nearest(dek, [m for m in sim.live_monsters if m.is_alive])
+            if target is not None and dist <= 2:
+                return {"type": "hunt", "target": target}
+        elif action == ACTION_FIGHT:
+            if sim.adversary.is_alive and sim.distance(dek, sim.adversary) <= 2:
+                return {"type": "fight", "target": sim.adversary}
+        elif action == ACTION_CARRY_THIA:
+            return {"type": "carry_thia"}
+
+        return {"type": "rest"}
+
+    def step(self, actions):
+        actions = np.asarray(actions, dtype=np.int64)
+        if actions.shape != (self.num_envs,):
+            raise ValueError(f"Expected {self.num_envs} actions, got shape {actions.shape}")
+
+        with self._silenced():
+            for i, sim in enumerate(self.sims):
+                sim.step(self._to_dek_action(sim, int(actions[i])))
+
+        current = np.array([self._tracked(sim) for sim in self.sims], dtype=np.float64)
+        delta = current - self._last
+
+        adversary_down = np.array([not sim.adversary.is_alive for sim in self.sims])
+        victory = np.array([down and self._defeated_by_dek(sim) for sim, down in zip(self.sims, adversary_down)])
+        defeat = np.array([not sim.dek.is_alive for sim in self.sims])
+        truncated = np.array([sim.turn >= self.max_turns for sim in self.sims])
+
+        rewards = (REWARD_WEIGHTS["reputation"] * delta[:, 0]
+                   + REWARD_WEIGHTS["damage_dealt"] * delta[:, 1]
+                   + REWARD_WEIGHTS["damage_taken"] * np.maximum(delta[:, 2], 0)
+                   + REWARD_WEIGHTS["victory"] * victory
+                   + REWARD_WEIGHTS["defeat"] * defeat)
+
+        dones = adversary_down | defeat | truncated
+        self._last = current
+        self.episode_returns += rewards
+
+        infos = [{} for _ in range(self.num_envs)]
+        for i in np.flatnonzero(dones):
+            sim = self.sims[i]
+            infos[i] = {
+                "episode_return": float(self.episode_returns[i]),
+                "turns": sim.turn,
+                "victory": bool(victory[i]),
+                "defeat": bool(defeat[i])
+            }
+            self._build(i)
+
+        return self._observe(), rewards.astype(np.float32), dones, infos
+
+    def _observe(self):
+        self.occupancy.fill(0)
+        env_ids, xs, ys, codes = [], [], [], []
+        dek_positions = np.empty((self.num_envs, 2), dtype=np.int64)
+        vitals = np.empty((self.num_envs, 3), dtype=np.float32)
+
+        for i, sim in enumerate(self.sims):
+            for agent in sim.get_live_agents():
+                if agent.is_alive:
+                    env_ids.append(i)
+                    xs.append(agent.position[0])
+                    ys.append(agent.position[1])
+                    codes.append(AGENT_TYPE_CODES.get(type(agent).__name__, 0))
+
+            dek = sim.dek
+            dek_positions[i] = dek.position
+            vitals[i] = (dek.health / dek.max_health, dek.stamina / dek.max_stamina, dek.reputation / 100)
+
+        if env_ids:
+            self.occupancy[np.array(env_ids),
+                           np.array(xs) % self.width,
+                           np.array(ys) % self.height] = np.array(codes, dtype=np.int8)
+
+        wx = (dek_positions[:, 0:1] + self._offsets) % self.width
+        wy = (dek_positions[:, 1:2] + self._offsets) % self.height
+        wx = wx[:, :, None]
+        wy = wy[:, None, :]
+
+        window = np.stack([self.terrain[self._env_index, wx, wy],
+                           self.occupancy[self._env_index, wx, wy]], axis=1)
+
+        return {"window": window, "vitals": vitals}
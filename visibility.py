@@ -0,0 +1,114 @@
+from collections import OrderedDict
+
+from grid import TerrainType
+
+
+BLOCKING_TERRAIN = frozenset((TerrainType.ROCKY_ZONE, TerrainType.HOSTILE_TERRAIN))
+
+
+def _line(dx, dy):
+    points = []
+    x, y = 0, 0
+    step_x = 1 if dx > 0 else -1
+    step_y = 1 if dy > 0 else -1
+    ax, ay = abs(dx), abs(dy)
+
+    if ax >= ay:
+        error = ax // 2
+        for _ in range(ax):
+            x += step_x
+            error -= ay
+            if error < 0:
+                y += step_y
+                error += ax
+            points.append((x, y))
+    else:
+        error = ay // 2
+        for _ in range(ay):
+            y += step_y
+            error -= ax
+            if error < 0:
+                x += step_x
+                error += ay
+            points.append((x, y))
+
+    return points
+
+
+class VisibilityMap:
+
+    def __init__(self, grid, blocking=BLOCKING_TERRAIN, max_cached=4096):
+        self.grid = grid
+        self.blocking = blocking
+        self.max_cached = max_cached
+        self._rays = {}
+        self._fields = OrderedDict()
+
+    def _get_rays(self, radius):
+        rays = self._rays.get(radius)
+        if rays is None:
+            rays = []
+            for dx in range(-radius, radius + 1):
+                for dy in range(-radius, radius + 1):
+                    if dx == 0 and dy == 0:
+                        continue
+                    rays.append((dx, dy, tuple(_line(dx, dy)[:-1])))
+            rays.sort(key=lambda ray: (abs(ray[0]) + abs(ray[1]), ray[0], ray[1]))
+            self._rays[radius] = rays
+        return rays
+
+    def _compute_field(self, x, y, radius):
+        grid = self.grid
+        width, height = grid.width, grid.height
+        cells = grid.cells
+        blocking = self.blocking
+
+        blocked = {}
+
+        def is_blocking(dx, dy):
+            key = (dx, dy)
+            value = blocked.get(key)
+            if value is None:
+                value = cells[(x + dx) % width][(y + dy) % height].terrain in blocking
+                blocked[key] = value
+            return value
+
+        field = [(x, y, cells[x][y])]
+        for dx, dy, between in self._get_rays(radius):
+            if not any(is_blocking(ix, iy) for ix, iy in between):
+                tx, ty = (x + dx) % width, (y + dy) % height
+                field.append((tx, ty, cells[tx][ty]))
+
+        return tuple(field)
+
+    def field_of_view(self, position, radius):
+        x, y = position[0] % self.grid.width, position[1] % self.grid.height
+        key = (x, y, radius)
+
+        field = self._fields.get(key)
+        if field is not None:
+            self._fields.move_to_end(key)
+            return field
+
+        field = self._compute_field(x, y, radius)
+        self._fields[key] = field
+        if len(self._fields) > self.max_cached:
+            self._fields.popitem(last=False)
+        return field
+
+    def precompute(self, radius):
+        for x in range(self.grid.width):
+            for y in range(self.grid.height):
+                self.field_of_view((x, y), radius)
+
+    def can_see(self, origin, target, radius):
+        tx, ty = target[0] % self.grid.width, target[1] % self.grid.height
+        return any(x == tx and y == ty for x, y, _ in self.field_of_view(origin, radius))
+
+    def visible_agents(self, position, radius, exclude=None):
+        agents = []
+        for _, _, cell in self.field_of_view(position, radius):
+            occupant = cell.occupant
+            if occupant is not None and occupant is not exclude and occupant.is_alive:
+                agents.append(occupant)
+        return agents
@@ -1,8 +1,7 @@
-import matplotlib.pyplot as plt
-
-
 class Visualizer:
 
+    LAZY_VIEWPORT = 25
+
     def __init__(self, simulation):
         self.sim = simulation
         self.history = {
@@ -15,17 +14,23 @@ class Visualizer:
             "monsters_alive": []
         }
 
-    def display_grid(self):
+    def display_grid(self, viewport=None):
         print("\n" + "=" * 60)
         print("GRID STATE")
         print("=" * 60)
 
         grid = self.sim.grid
+        if viewport is None and grid.is_lazy:
+            viewport = self.LAZY_VIEWPORT
+
+        width, height = grid.width, grid.height
+        if viewport is not None:
+            width, height = min(width, viewport), min(height, viewport)
 
         display = []
-        for y in range(grid.height):
+        for y in range(height):
             row = []
-            for x in range(grid.width):
+            for x in range(width):
                 cell = grid.cells[x][y]
                 if cell.occupant:
                     row.append(str(cell.occupant))
@@ -34,13 +39,13 @@ class Visualizer:
             display.append(row)
 
         print("   ", end="")
-        for x in range(min(grid.width, 25)):
+        for x in range(width):
             print(f"{x % 10}", end=" ")
         print()
 
-        for y, row in enumerate(display[:25]):
+        for y, row in enumerate(display):
             print(f"{y:2} ", end="")
-            for cell in row[:25]:
+            for cell in row:
                 print(cell, end=" ")
             print()
 
@@ -70,10 +75,10 @@ class Visualizer:
 
         print(f"\nAdversary - Health: {self.sim.adversary.health}/{self.sim.adversary.max_health}")
 
-        monsters_alive = sum(1 for m in self.sim.monsters if m.is_alive)
+        monsters_alive = self.sim.alive_counts.get("Monster", 0)
         print(f"Monsters - Alive: {monsters_alive}/{len(self.sim.monsters)}")
 
-        predators_alive = sum(1 for p in self.sim.predators if p.is_alive)
+        predators_alive = self.sim.alive_counts.get("Predator", 0)
         print(f"Predators - Active: {predators_alive}/{len(self.sim.predators)}")
 
         print("-" * 60)
@@ -91,6 +96,8 @@ class Visualizer:
             print("Insufficient data for plotting.")
             return
 
+        import matplotlib.pyplot as plt
+
         fig, axes = plt.subplots(2, 3, figsize=(15, 10))
         fig.suptitle('Predator: Badlands Simulation Statistics', fontsize=16)
 
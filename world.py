@@ -0,0 +1,205 @@
+from multiprocessing import shared_memory
+import json
+import mmap
+import random
+import struct
+
+from grid import TERRAIN_CODES, TERRAIN_DISTRIBUTION, TerrainType
+
+
+WORLD_MAGIC = b"BADWORLD"
+WORLD_VERSION = 1
+WORLD_HEADER = struct.Struct("<8sIIIQQQ")
+WORLD_LAYERS_OFFSET = mmap.ALLOCATIONGRANULARITY
+ROSTER_KEYS = ("dek", "thia", "predators", "adversary", "monsters", "random_monsters")
+
+
+class WorldLayers:
+
+    LAYER_COUNT = 3
+
+    def __init__(self, width, height, buffer):
+        self.width = width
+        self.height = height
+
+        size = width * height
+        self._view = memoryview(buffer)
+        if len(self._view) < size * self.LAYER_COUNT:
+            raise ValueError(f"Buffer holds {len(self._view)} bytes, {size * self.LAYER_COUNT} required")
+
+        self.terrain = self._view[0:size]
+        self.stamina_cost = self._view[size:2 * size]
+        self.traps = self._view[2 * size:3 * size]
+
+    @staticmethod
+    def nbytes(width, height):
+        return width * height * WorldLayers.LAYER_COUNT
+
+    @staticmethod
+    def write_grid(grid, buffer):
+        size = grid.width * grid.height
+        view = memoryview(buffer)
+
+        terrain = bytearray(size)
+        stamina_cost = bytearray(size)
+        traps = bytearray(size)
+        for x in range(grid.width):
+            column = grid.cells[x]
+            base = x * grid.height
+            for y in range(grid.height):
+                cell = column[y]
+                terrain[base + y] = TERRAIN_CODES[cell.terrain]
+                stamina_cost[base + y] = cell.stamina_cost
+                traps[base + y] = cell.is_trap
+
+        view[0:size] = terrain
+        view[size:2 * size] = stamina_cost
+        view[2 * size:3 * size] = traps
+
+    @staticmethod
+    def generate(width, height, buffer):
+        size = width * height
+        view = memoryview(buffer)
+        terrain = view[0:size]
+        stamina_cost = view[size:2 * size]
+        traps = view[2 * size:3 * size]
+
+        terrain[:] = bytes(size)
+        stamina_cost[:] = b"\x01" * size
+        traps[:] = bytes(size)
+
+        for kind, density, cost in TERRAIN_DISTRIBUTION:
+            code = TERRAIN_CODES[kind]
+            for _ in range(int(size * density)):
+                x, y = random.randint(0, width - 1), random.randint(0, height - 1)
+                index = x * height + y
+                terrain[index] = code
+                if kind == TerrainType.TRAP:
+                    traps[index] = 1
+                else:
+                    stamina_cost[index] = cost
+
+    def release(self):
+        self.terrain.release()
+        self.stamina_cost.release()
+        self.traps.release()
+        self._view.release()
+
+
+class SharedWorld:
+
+    def __init__(self, width, height, shm, owner):
+        self.width = width
+        self.height = height
+        self.shm = shm
+        self.owner = owner
+        self._readonly = shm.buf.toreadonly()
+        self.layers = WorldLayers(width, height, self._readonly)
+
+    @classmethod
+    def from_grid(cls, grid):
+        shm = shared_memory.SharedMemory(create=True, size=WorldLayers.nbytes(grid.width, grid.height))
+        WorldLayers.write_grid(grid, shm.buf)
+        return cls(grid.width, grid.height, shm, owner=True)
+
+    @classmethod
+    def generate(cls, width, height):
+        shm = shared_memory.SharedMemory(create=True, size=WorldLayers.nbytes(width, height))
+        WorldLayers.generate(width, height, shm.buf)
+        return cls(width, height, shm, owner=True)
+
+    @classmethod
+    def attach(cls, handle):
+        name, width, height = handle
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(width, height, shm, owner=False)
+
+    @property
+    def handle(self):
+        return (self.shm.name, self.width, self.height)
+
+    def close(self):
+        self.layers.release()
+        self._readonly.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def save_world(path, scenario, grid=None):
+    width, height = scenario["width"], scenario["height"]
+    roster = json.dumps({key: scenario[key] for key in ROSTER_KEYS if key in scenario}).encode()
+
+    layers_size = WorldLayers.nbytes(width, height)
+    roster_offset = WORLD_LAYERS_OFFSET + layers_size
+
+    with open(path, "w+b") as f:
+        f.truncate(roster_offset + len(roster))
+        with mmap.mmap(f.fileno(), 0) as mapped:
+            WORLD_HEADER.pack_into(mapped, 0, WORLD_MAGIC, WORLD_VERSION, width, height,
+                                   WORLD_LAYERS_OFFSET, roster_offset, len(roster))
+
+            layers = memoryview(mapped)[WORLD_LAYERS_OFFSET:roster_offset]
+            if grid is not None:
+                WorldLayers.write_grid(grid, layers)
+            else:
+                random.seed(scenario.get("seed"))
+                WorldLayers.generate(width, height, layers)
+            layers.release()
+
+            mapped[roster_offset:roster_offset + len(roster)] = roster
+            mapped.flush()
+
+
+class WorldFile:
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, width, height, layers_offset, roster_offset, roster_length = \
+            WORLD_HEADER.unpack_from(self.mmap, 0)
+        if magic != WORLD_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a world file")
+        if version != WORLD_VERSION:
+            self.close()
+            raise ValueError(f"{path} has unsupported world file version {version}")
+
+        self.width = width
+        self.height = height
+        self._view = memoryview(self.mmap)
+        self._layers_view = self._view[layers_offset:layers_offset + WorldLayers.nbytes(width, height)]
+        self.layers = WorldLayers(width, height, self._layers_view)
+        self.roster = json.loads(bytes(self._view[roster_offset:roster_offset + roster_length]))
+
+    def scenario(self, base):
+        scenario = dict(base)
+        scenario.update(self.roster)
+        scenario["width"] = self.width
+        scenario["height"] = self.height
+        return scenario
+
+    def close(self):
+        if getattr(self, "layers", None):
+            self.layers.release()
+            self._layers_view.release()
+            self._view.release()
+        self.mmap.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()